@@ -1,92 +1,92 @@
-import re
 from error import *
 
+# Patterns are compiled once by the first argument read from XML, programs loaded from the cache don't import re
+ESCAPE_SEQUENCE = None
+STRING_PATTERN = None
+NAME_PATTERN = None
+
+def compile_patterns():
+    """ Compiles the patterns of lexical checks """
+
+    global ESCAPE_SEQUENCE, STRING_PATTERN, NAME_PATTERN
+    import re
+    ESCAPE_SEQUENCE = re.compile(r"\\[0-9][0-9][0-9]")
+    STRING_PATTERN = re.compile(r"^([^#\\\\]|(\\\\[0-9][0-9][0-9]))*$")
+    NAME_PATTERN = re.compile(r"^[a-zA-Z_$&%*!?\-][a-zA-Z0-9_$&%*!?\-]*$")
+
+def replace_escape_sequence(match):
+    """ Converts one escape sequence \\ddd into a character """
+
+    return chr(int(match.group()[1:]))
+
 class Arg:
-    datatype = None
-    frame = None
-    value = None
+    __slots__ = ("datatype", "frame", "value", "scope", "slot", "const")
 
     def __init__(self, arg):
         """ Extracts values from <argN> XML element
         if the parameter is None it will define empty Argument """
 
+        self.datatype = None
+        self.frame = None
+        self.value = None
+        # Frame index of a variable, set by Program.resolve_variables
+        self.scope = None
+        # Slot index of a variable, index of a constant in the constant pool
+        # or index of the LABEL instruction a label operand refers to
+        self.slot = None
+        # Runtime Value of a constant from the constant pool, set by Program.resolve_constants
+        self.const = None
+
         if arg == None:
             return
-        if len(arg.attributes) != 1:
+        if NAME_PATTERN == None:
+            compile_patterns()
+        if len(arg.attrib) != 1:
             err.exit_script(err.lexical_or_syntax)
 
-        if "type" not in arg.attributes:
+        if "type" not in arg.attrib:
             err.exit_script(err.lexical_or_syntax)
-        self.datatype = arg.attributes["type"].value
-        
-        if arg.firstChild == None and self.datatype != "string":
+        self.datatype = arg.attrib["type"]
+
+        # Argument holds text only
+        if len(arg) != 0:
+            err.exit_script(err.lexical_or_syntax)
+
+        if arg.text == None and self.datatype != "string":
             err.exit_script(err.lexical_or_syntax)
 
         if self.datatype == "var":
-            self.frame = arg.firstChild.nodeValue.partition("@")[0]
-            self.value = arg.firstChild.nodeValue.partition("@")[2]
+            self.frame = arg.text.partition("@")[0]
+            self.value = arg.text.partition("@")[2]
         else:
             self.frame = None
-            if arg.firstChild != None:
-                self.value = arg.firstChild.nodeValue
+            if arg.text != None:
+                self.value = arg.text
                 if self.datatype == "string":
                     self.value = self.decode_string()
             else:
                 self.value = ""
 
-    def write(self, std):
-        """ Writes its own value to a specified output stream """
-
-        if self.datatype == "nil":
-            std.write("")
-        elif self.datatype == "float":
-            std.write(self.value.hex())
-        else:
-            std.write(str(self.value))
-
-    def read(self, datatype):
-        """ Reads a value from stdin with type specified by datatype """
-
-        try:
-            self.datatype = datatype
-            input_value = input()
-        except:
-            if datatype == "int":
-                self.value = 0
-            elif datatype == "bool":
-                self.value = "false"
-            elif datatype == "string":
-                self.value = ""
-            elif datatype == "float":
-                self.value = 0.0
-            return
-
-        if datatype == "int":
-            self.value = input_value
-            if not self.is_valid_int():
-                self.value = 0
-        elif datatype == "bool": 
-            if input_value.upper() == "TRUE":
-                self.value = "true"
-            else:
-                self.value = "false"
-        elif datatype == "string": 
-            self.value = input_value
-            #if not self.is_valid_string():     # Lexical check shouldn't be needed...
-            #    self.value = ""
-        elif datatype == "float": 
-            self.value = input_value
-            if not self.is_valid_float():
-                self.value = 0.0
-
     def decode_string(self):
         """ Converts string's escape sequences into regular characters """
 
-        def replace(match):
-            return chr(int(match.group()[1:]))
+        if "\\" not in self.value:
+            return self.value
+        return ESCAPE_SEQUENCE.sub(replace_escape_sequence, self.value)
+
+    def source(self):
+        """ Formats a decoded argument in IPPcode19 syntax """
 
-        regex = re.compile(r"\\[0-9][0-9][0-9]")
-        return re.sub(regex, replace, self.value)
+        if self.datatype == "var":
+            return self.frame + "@" + self.value
+        elif self.datatype == "label" or self.datatype == "type":
+            return self.value
+        elif self.datatype == "float":
+            return "float@" + self.value.hex()
+        elif self.datatype == "string":
+            return "string@" + "".join(char if char.isprintable() and char not in " #\\" else "\\{:03d}".format(ord(char)) for char in self.value)
+        else:
+            return self.datatype + "@" + str(self.value)
 
     def is_valid_int(self):
         """ Lexically checks whether the value is a valid integer and converts it """
@@ -110,8 +110,7 @@ class Arg:
         """ Lexically checks whether the value is a valid string """
 
         if self.datatype == "string":
-            pattern = re.compile(r"^([^#\\\\]|(\\\\[0-9][0-9][0-9]))*$")
-            result = re.match(pattern, self.value)
+            result = STRING_PATTERN.match(self.value)
             if result != None:
                 return True
         return False
@@ -120,7 +119,10 @@ class Arg:
         """ Converts hexadecimal float into regular float """
 
         if self.datatype == "float":
-            self.value = float.fromhex(self.value)
+            try:
+                self.value = float.fromhex(self.value)
+            except ValueError:
+                return False
             return True
         return False
 
@@ -128,8 +130,7 @@ class Arg:
         """ Lexically checks whether the value is a valid variable name """
 
         if self.datatype == "var" and self.frame == "GF" or self.frame == "TF" or self.frame == "LF":
-            pattern = re.compile(r"^[a-zA-Z_$&%*!?\-][a-zA-Z0-9_$&%*!?\-]*$")
-            result = re.match(pattern, self.value)
+            result = NAME_PATTERN.match(self.value)
             if result != None:
                 return True
         return False
@@ -147,8 +148,7 @@ class Arg:
         """ Lexically checks whether the value is a valid label name """
 
         if self.datatype == "label":
-            pattern = re.compile(r"^[a-zA-Z_$&%*!?\-][a-zA-Z0-9_$&%*!?\-]*$")
-            result = re.match(pattern, self.value)
+            result = NAME_PATTERN.match(self.value)
             if result != None:
                 return True
         return False
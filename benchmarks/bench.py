@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import platform
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INTERPRET = os.path.join(os.path.dirname(BENCHMARKS_DIR), "interpret.py")
+
+# Program used to measure the startup, it executes no instruction
+EMPTY_PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode19">
+</program>
+"""
+
+def write_io_input(path):
+    """ Input of io.xml, 100000 groups of an int and a string line """
+
+    with open(path, "w") as input_file:
+        for group in range(0, 100000):
+            input_file.write(str(group) + "\nline " + str(group) + "\n")
+
+# Generated inputs of programs by file name, other programs read PROGRAM.in if it exists or nothing
+INPUTS = {"io.xml": write_io_input}
+
+def write_instruction(program_file, order, opcode, *args):
+    """ Writes one instruction of a generated program, args are (type, text) pairs """
+
+    program_file.write('  <instruction order="{}" opcode="{}">'.format(order, opcode))
+    for index, (datatype, text) in enumerate(args):
+        program_file.write('<arg{0} type="{1}">{2}</arg{0}>'.format(index + 1, datatype, text))
+    program_file.write("</instruction>\n")
+
+def write_functions_program(path):
+    """ 500 functions with 20 local variables each, only one of them recurses 5000 calls deep with
+    a new frame in every call, the others only make the program large (as generated programs are) """
+
+    instructions = [("DEFVAR", ("var", "GF@depth")), ("MOVE", ("var", "GF@depth"), ("int", "0")),
+                    ("CALL", ("label", "rec")), ("WRITE", ("var", "GF@depth")), ("EXIT", ("int", "0")),
+                    ("LABEL", ("label", "rec")), ("CREATEFRAME",), ("PUSHFRAME",)]
+    for variable in range(0, 20):
+        instructions += [("DEFVAR", ("var", "LF@r" + str(variable))), ("MOVE", ("var", "LF@r" + str(variable)), ("int", str(variable)))]
+    instructions += [("ADD", ("var", "GF@depth"), ("var", "GF@depth"), ("int", "1")),
+                     ("JUMPIFEQ", ("label", "done"), ("var", "GF@depth"), ("int", "5000")),
+                     ("CALL", ("label", "rec")), ("LABEL", ("label", "done")), ("POPFRAME",), ("RETURN",)]
+    for function in range(0, 500):
+        instructions += [("LABEL", ("label", "f" + str(function))), ("CREATEFRAME",), ("PUSHFRAME",)]
+        instructions += [("DEFVAR", ("var", "LF@f{}_v{}".format(function, variable))) for variable in range(0, 20)]
+        instructions += [("POPFRAME",), ("RETURN",)]
+
+    with open(path, "w") as program_file:
+        program_file.write('<?xml version="1.0" encoding="UTF-8"?>\n<program language="IPPcode19">\n')
+        for order, (opcode, *args) in enumerate(instructions):
+            write_instruction(program_file, order + 1, opcode, *args)
+        program_file.write("</program>\n")
+
+# Programs generated into a temporary directory, they are measured with the programs of benchmarks directory
+GENERATED = {"functions.xml": write_functions_program}
+
+def run_once(command, input_path):
+    """ Runs the command, returns its wall time and peak RSS in KiB """
+
+    with open(input_path, "rb") as stdin:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdin=stdin, stdout=subprocess.DEVNULL)
+        # wait4 gives resource usage of this child only
+        status, usage = os.wait4(process.pid, 0)[1:]
+        elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        sys.exit(" ".join(command) + " exited with " + str(process.returncode))
+    return elapsed, usage.ru_maxrss
+
+def run_benchmark(command, input_path, warmup, repeat):
+    """ Runs the command warmup times without measuring and repeat times measured,
+    returns the list of wall times and the peak RSS """
+
+    for i in range(0, warmup):
+        run_once(command, input_path)
+    times = []
+    peak_rss = 0
+    for i in range(0, repeat):
+        elapsed, rss = run_once(command, input_path)
+        times.append(elapsed)
+        peak_rss = max(peak_rss, rss)
+    return times, peak_rss
+
+def median(values):
+    """ Returns the median of values """
+
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def program_input(program, directory):
+    """ Returns the input file of a program """
+
+    name = os.path.basename(program)
+    if name in INPUTS:
+        path = os.path.join(directory, name + ".in")
+        INPUTS[name](path)
+        return path
+    path = os.path.splitext(program)[0] + ".in"
+    return path if os.path.exists(path) else os.devnull
+
+
+parser = argparse.ArgumentParser(description="measures instructions per second, wall time, peak RSS and startup time of interpret.py on benchmark programs")
+parser.add_argument("programs", nargs="*", help="IPPcode19 XML programs, all *.xml files in benchmarks directory and the generated programs ("
+                    + ", ".join(sorted(GENERATED)) + ") by default")
+parser.add_argument("--interpret", default=DEFAULT_INTERPRET, help="path to interpret.py to be measured")
+parser.add_argument("--flag", dest="flags", action="append", default=[], help="extra parameter of interpret.py, e.g. --flag=--optimize (can be repeated)")
+parser.add_argument("--warmup", type=int, default=1, help="amount of unmeasured runs of every program before the measured ones, 1 by default (compiles the program into the cache)")
+parser.add_argument("--repeat", type=int, default=3, help="amount of measured runs of every program, the best and median times are reported")
+parser.add_argument("--json", dest="json_file", help="writes all measured times to this file")
+args = parser.parse_args()
+
+programs = args.programs
+generated = len(programs) == 0
+if generated:
+    programs = sorted(os.path.join(BENCHMARKS_DIR, name) for name in os.listdir(BENCHMARKS_DIR) if name.endswith(".xml"))
+
+results = {"interpret": os.path.abspath(args.interpret), "flags": args.flags, "python": platform.python_version(),
+           "warmup": args.warmup, "repeat": args.repeat, "programs": []}
+
+with tempfile.TemporaryDirectory() as directory:
+    stats_file = os.path.join(directory, "stats")
+    if generated:
+        for name in sorted(GENERATED):
+            programs.append(os.path.join(directory, name))
+            GENERATED[name](programs[-1])
+
+    empty = os.path.join(directory, "empty.xml")
+    with open(empty, "w") as empty_file:
+        empty_file.write(EMPTY_PROGRAM)
+    times, peak_rss = run_benchmark([sys.executable, args.interpret, "--source=" + empty] + args.flags, os.devnull, args.warmup, args.repeat)
+    results["startup"] = {"times": times, "best": min(times), "median": median(times), "peak_rss_kib": peak_rss}
+    print("{:<16} {:>10} {:>9} {:>9} {:>13} {:>10}".format("program", "insts", "best s", "median s", "insts/s", "RSS MiB"))
+    print("{:<16} {:>10} {:>9.3f} {:>9.3f} {:>13} {:>10.1f}".format("(startup)", 0, min(times), median(times), "-", peak_rss / 1024))
+
+    for program in programs:
+        input_path = program_input(program, directory)
+        command = [sys.executable, args.interpret, "--source=" + program, "--input=" + input_path, "--stats=" + stats_file, "--insts"] + args.flags
+        times, peak_rss = run_benchmark(command, input_path, args.warmup, args.repeat)
+        with open(stats_file) as stats:
+            executed = int(stats.readline())
+
+        best = min(times)
+        results["programs"].append({"name": os.path.basename(program), "insts": executed, "times": times, "best": best,
+                                    "median": median(times), "insts_per_s": executed / best, "peak_rss_kib": peak_rss})
+        print("{:<16} {:>10} {:>9.3f} {:>9.3f} {:>13.0f} {:>10.1f}".format(os.path.basename(program), executed, best, median(times),
+                                                                        executed / best, peak_rss / 1024))
+
+if args.json_file != None:
+    with open(args.json_file, "w") as json_file:
+        json.dump(results, json_file, indent=2)
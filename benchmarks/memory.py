@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import runpy
+import argparse
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INTERPRET = os.path.join(os.path.dirname(BENCHMARKS_DIR), "interpret.py")
+
+parser = argparse.ArgumentParser(description="runs interpret.py in-process under tracemalloc and reports memory allocations")
+parser.add_argument("program", nargs="?", default=os.path.join(BENCHMARKS_DIR, "stack_deep.xml"), help="IPPcode19 XML program, stack_deep.xml by default")
+parser.add_argument("--interpret", default=DEFAULT_INTERPRET, help="path to interpret.py to be measured")
+parser.add_argument("--top", type=int, default=5, help="amount of allocation sites to be listed")
+args = parser.parse_args()
+
+interpret = os.path.abspath(args.interpret)
+sys.path.insert(0, os.path.dirname(interpret))
+sys.argv = [interpret, "--source=" + args.program, "--input=" + os.devnull]
+
+stdout = sys.stdout
+sys.stdout = open(os.devnull, "w")
+tracemalloc.start()
+try:
+    runpy.run_path(interpret, run_name="__main__")
+except SystemExit:
+    pass
+# Values left on the data stack and in frames are still alive here
+snapshot = tracemalloc.take_snapshot()
+current, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+sys.stdout = stdout
+
+statistics = snapshot.statistics("lineno")
+print("peak traced memory: {:.1f} MiB".format(peak / (1 << 20)))
+print("live blocks at exit: {}".format(sum(stat.count for stat in statistics)))
+for stat in sorted(statistics, key=lambda stat: stat.count, reverse=True)[:args.top]:
+    print("{:>9} blocks {:>9.1f} KiB  {}".format(stat.count, stat.size / 1024, stat.traceback))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INTERPRET = os.path.join(os.path.dirname(BENCHMARKS_DIR), "interpret.py")
+
+# Reads groups of int, string, bool and float lines until the counter reaches the amount of groups,
+# prints the sum of the ints
+PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode19">
+  <instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@i</arg1></instruction>
+  <instruction order="2" opcode="DEFVAR"><arg1 type="var">GF@n</arg1></instruction>
+  <instruction order="3" opcode="DEFVAR"><arg1 type="var">GF@sum</arg1></instruction>
+  <instruction order="4" opcode="DEFVAR"><arg1 type="var">GF@x</arg1></instruction>
+  <instruction order="5" opcode="MOVE"><arg1 type="var">GF@i</arg1><arg2 type="int">0</arg2></instruction>
+  <instruction order="6" opcode="MOVE"><arg1 type="var">GF@sum</arg1><arg2 type="int">0</arg2></instruction>
+  <instruction order="7" opcode="LABEL"><arg1 type="label">loop</arg1></instruction>
+  <instruction order="8" opcode="READ"><arg1 type="var">GF@n</arg1><arg2 type="type">int</arg2></instruction>
+  <instruction order="9" opcode="ADD"><arg1 type="var">GF@sum</arg1><arg2 type="var">GF@sum</arg2><arg3 type="var">GF@n</arg3></instruction>
+  <instruction order="10" opcode="READ"><arg1 type="var">GF@x</arg1><arg2 type="type">string</arg2></instruction>
+  <instruction order="11" opcode="READ"><arg1 type="var">GF@x</arg1><arg2 type="type">bool</arg2></instruction>
+  <instruction order="12" opcode="READ"><arg1 type="var">GF@x</arg1><arg2 type="type">float</arg2></instruction>
+  <instruction order="13" opcode="ADD"><arg1 type="var">GF@i</arg1><arg2 type="var">GF@i</arg2><arg3 type="int">1</arg3></instruction>
+  <instruction order="14" opcode="JUMPIFNEQ"><arg1 type="label">loop</arg1><arg2 type="var">GF@i</arg2><arg3 type="int">{groups}</arg3></instruction>
+  <instruction order="15" opcode="WRITE"><arg1 type="var">GF@sum</arg1></instruction>
+</program>
+"""
+
+def write_input(path, groups):
+    """ Writes groups of int, string, bool and float lines, returns the expected sum """
+
+    with open(path, "w") as input_file:
+        for group in range(0, groups):
+            input_file.write(str(group) + "\nline " + str(group) + "\ntrue\n" + float(group).hex() + "\n")
+    return groups * (groups - 1) // 2
+
+def run(command, stdin):
+    """ Runs the interpreter, returns its output and wall time """
+
+    start = time.perf_counter()
+    result = subprocess.run(command, stdin=stdin, stdout=subprocess.PIPE, check=True)
+    return result.stdout.decode(), time.perf_counter() - start
+
+
+parser = argparse.ArgumentParser(description="measures READ throughput of interpret.py on a generated input")
+parser.add_argument("--lines", type=int, default=1000000, help="amount of input lines, 1M by default")
+parser.add_argument("--interpret", default=DEFAULT_INTERPRET, help="path to interpret.py to be measured")
+parser.add_argument("--flag", dest="flags", action="append", default=[], help="extra parameter of interpret.py, e.g. --flag=--engine=closure (can be repeated)")
+parser.add_argument("--repeat", type=int, default=3, help="amount of runs, the best time is reported")
+args = parser.parse_args()
+
+groups = args.lines // 4
+with tempfile.TemporaryDirectory() as directory:
+    source = os.path.join(directory, "read.xml")
+    input_path = os.path.join(directory, "read.in")
+    with open(source, "w") as source_file:
+        source_file.write(PROGRAM.format(groups=groups))
+    expected = write_input(input_path, groups)
+
+    for mode in ("--input", "stdin"):
+        best_time = None
+        for i in range(0, args.repeat):
+            command = [sys.executable, args.interpret, "--source=" + source, "--no-cache"] + args.flags
+            if mode == "--input":
+                output, elapsed = run(command + ["--input=" + input_path], subprocess.DEVNULL)
+            else:
+                with open(input_path, "rb") as stdin:
+                    output, elapsed = run(command, stdin)
+            if output != str(expected):
+                sys.exit("unexpected output " + repr(output[:20]) + ", expected " + str(expected))
+            if best_time == None or elapsed < best_time:
+                best_time = elapsed
+        print("{:<8} {:>8} lines {:>8.3f} s {:>12.0f} lines/s".format(mode, groups * 4, best_time, groups * 4 / best_time))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import socket
+import tempfile
+import argparse
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# A small program, its run time is negligible compared to the startup
+PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode19">
+  <instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@x</arg1></instruction>
+  <instruction order="2" opcode="READ"><arg1 type="var">GF@x</arg1><arg2 type="type">int</arg2></instruction>
+  <instruction order="3" opcode="MUL"><arg1 type="var">GF@x</arg1><arg2 type="var">GF@x</arg2><arg3 type="int">2</arg3></instruction>
+  <instruction order="4" opcode="WRITE"><arg1 type="var">GF@x</arg1></instruction>
+</program>
+"""
+
+def measure(command, input_path, runs):
+    """ Runs the command, returns the median latency of one run """
+
+    times = []
+    for i in range(0, runs):
+        start = time.perf_counter()
+        result = subprocess.run(command + ["--input=" + input_path], stdout=subprocess.PIPE, check=True)
+        times.append(time.perf_counter() - start)
+        if result.stdout != b"42":
+            sys.exit("unexpected output " + repr(result.stdout))
+    times.sort()
+    return times[len(times) // 2]
+
+def wait_for(path, server):
+    """ Waits until the server listens on path """
+
+    while server.poll() == None:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(path)
+            return
+        except OSError:
+            time.sleep(0.01)
+    sys.exit("server.py failed to start")
+
+
+parser = argparse.ArgumentParser(description="compares per-program latency of a cold interpret.py start and client.py with a running server.py")
+parser.add_argument("--runs", type=int, default=50, help="amount of runs of every variant, the median is reported")
+parser.add_argument("--flag", dest="flags", action="append", default=[], help="extra parameter of interpret.py, e.g. --flag=--no-cache (can be repeated)")
+args = parser.parse_args()
+
+with tempfile.TemporaryDirectory() as directory:
+    source = os.path.join(directory, "small.xml")
+    input_path = os.path.join(directory, "small.in")
+    socket_path = os.path.join(directory, "server.sock")
+    with open(source, "w") as source_file:
+        source_file.write(PROGRAM)
+    with open(input_path, "w") as input_file:
+        input_file.write("21\n")
+
+    server = subprocess.Popen([sys.executable, os.path.join(PACKAGE_DIR, "server.py"), "--socket=" + socket_path])
+    try:
+        wait_for(socket_path, server)
+        os.environ["IPP_SOCKET"] = socket_path
+        cold = measure([sys.executable, os.path.join(PACKAGE_DIR, "interpret.py"), "--source=" + source] + args.flags, input_path, args.runs)
+        warm = measure([sys.executable, os.path.join(PACKAGE_DIR, "client.py"), "--source=" + source] + args.flags, input_path, args.runs)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print("{:<12} {:>8.1f} ms".format("interpret.py", cold * 1000))
+    print("{:<12} {:>8.1f} ms".format("client.py", warm * 1000))
+    print("{:<12} {:>8.1f} ms ({:.1f}x)".format("difference", (cold - warm) * 1000, cold / warm))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INTERPRET = os.path.join(os.path.dirname(BENCHMARKS_DIR), "interpret.py")
+
+# Modules that must not be imported when a compiled program is run by the default engine
+HEAVY_MODULES = ("argparse", "inspect", "xml.etree.ElementTree", "tempfile", "re", "locale", "hashlib")
+
+PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode19">
+  <instruction order="1" opcode="WRITE"><arg1 type="string">ok</arg1></instruction>
+</program>
+"""
+
+def import_times(command):
+    """ Runs the command with -X importtime, returns a dictionary of modules imported by the script (after site)
+    with their cumulative import times in microseconds and the total import time of the script """
+
+    result = subprocess.run([sys.executable, "-X", "importtime"] + command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+    modules = {}
+    total = 0
+    after_site = False
+    for line in result.stderr.decode().splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        if not after_site:
+            after_site = name.strip() == "site" and not name.startswith("  ")
+            continue
+        modules[name.strip()] = int(cumulative)
+        if not name.startswith("  "):
+            # Only top level imports of the script, the nested ones are in their cumulative time
+            total += int(cumulative)
+    return modules, total
+
+def wall_time(command):
+    """ Returns wall time of one run of the command """
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + command, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def median(values):
+    """ Returns the median of values """
+
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+parser = argparse.ArgumentParser(description="measures startup of interpret.py running a trivial compiled program")
+parser.add_argument("--interpret", default=DEFAULT_INTERPRET, help="path to interpret.py to be measured")
+parser.add_argument("--flag", dest="flags", action="append", default=[], help="extra parameter of interpret.py, e.g. --flag=--engine=closure (can be repeated)")
+parser.add_argument("--repeat", type=int, default=20, help="amount of runs, medians are reported")
+parser.add_argument("--budget", type=float, default=40, help="budget of the import time of interpret.py in ms, 40 by default, exceeding it fails the benchmark")
+args = parser.parse_args()
+
+with tempfile.TemporaryDirectory() as directory:
+    source = os.path.join(directory, "startup.xml")
+    with open(source, "w") as source_file:
+        source_file.write(PROGRAM)
+    command = [args.interpret, "--source=" + source, "--input=" + os.devnull] + args.flags
+    # The first run compiles the program into the cache
+    wall_time(command)
+
+    totals = []
+    for i in range(0, args.repeat):
+        modules, total = import_times(command)
+        totals.append(total)
+    python_time = median([wall_time(["-c", "pass"]) for i in range(0, args.repeat)])
+    interpret_time = median([wall_time(command) for i in range(0, args.repeat)])
+
+import_time = median(totals) / 1000
+print("{:<24} {:>8.1f} ms".format("python3 -c pass", python_time * 1000))
+print("{:<24} {:>8.1f} ms".format("interpret.py", interpret_time * 1000))
+print("{:<24} {:>8.1f} ms (budget {:.1f} ms)".format("imports of interpret.py", import_time, args.budget))
+for name, cumulative in sorted(modules.items(), key=lambda item: -item[1])[:10]:
+    print("  {:<22} {:>8.1f} ms".format(name, cumulative / 1000))
+
+heavy = [name for name in HEAVY_MODULES if name in modules]
+if heavy:
+    print("imported heavy modules: " + ", ".join(heavy))
+if heavy or import_time > args.budget:
+    sys.exit(1)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import sys
+import tempfile
+import argparse
+import threading
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from interpreter import Interpreter
+from error import IppError
+
+# Options of Interpreter checked by the script, every engine locates errors itself
+MODES = {
+    "default": {},
+    "optimize": {"optimize": True},
+    "closure": {"engine": "closure"},
+    "closure-optimize": {"engine": "closure", "optimize": True},
+    "jit": {"jit": True, "jit_threshold": 1},
+    "emit-python": {"emit_python": True},
+}
+
+def instruction(order, opcode, *args):
+    """ Returns an instruction element, args are (type, text) pairs """
+
+    arguments = "".join('<arg{0} type="{1}">{2}</arg{0}>'.format(index + 1, kind, text) for index, (kind, text) in enumerate(args))
+    return '  <instruction order="{}" opcode="{}">{}</instruction>\n'.format(order, opcode, arguments)
+
+def program(iterations, padding):
+    """ Returns a program writing numbers 1 to iterations and failing by adding a string,
+    padding instructions before the loop move the failing instruction, returns (source, its order, output) """
+
+    body = [("DEFVAR", ("var", "GF@i")), ("MOVE", ("var", "GF@i"), ("int", "0"))]
+    body += [("MOVE", ("var", "GF@i"), ("int", "0"))] * padding
+    body += [("LABEL", ("label", "loop")),
+             ("ADD", ("var", "GF@i"), ("var", "GF@i"), ("int", "1")),
+             ("WRITE", ("var", "GF@i")),
+             ("JUMPIFNEQ", ("label", "loop"), ("var", "GF@i"), ("int", str(iterations))),
+             ("ADD", ("var", "GF@i"), ("var", "GF@i"), ("string", "x"))]
+    source = '<?xml version="1.0" encoding="UTF-8"?>\n<program language="IPPcode19">\n'
+    for order, (opcode, *args) in enumerate(body, 1):
+        source += instruction(order, opcode, *args)
+    source += "</program>\n"
+    output = "".join(str(number) for number in range(1, iterations + 1))
+    return source.encode(), len(body), output.encode()
+
+def run(interpreter, source, expected_order, expected_output, repeat, barrier, failures):
+    """ Runs the program repeat times, records every run which did not fail at the expected instruction """
+
+    barrier.wait()
+    for i in range(0, repeat):
+        stdout = io.BytesIO()
+        try:
+            interpreter.run(source, b"", stdout)
+            failures.append("no error")
+        except IppError as error:
+            expected_message = "Error at inst " + str(expected_order) + ": Incompatible operand types"
+            if error.code != 53 or error.inst_order != expected_order or error.message != expected_message:
+                failures.append(error.message)
+        if stdout.getvalue() != expected_output:
+            failures.append("output " + repr(stdout.getvalue()[:20]))
+
+
+parser = argparse.ArgumentParser(description="runs two Interpreter instances concurrently, fails if an error is reported at a wrong instruction")
+parser.add_argument("--mode", dest="modes", action="append", choices=sorted(MODES), help="checked mode (can be repeated), all by default")
+parser.add_argument("--repeat", type=int, default=20, help="amount of runs of every instance")
+args = parser.parse_args()
+
+# Frequent switching interleaves the runs of both threads
+sys.setswitchinterval(1e-5)
+programs = [program(300, 0), program(200, 5)]
+failed = False
+with tempfile.TemporaryDirectory() as directory:
+    for mode in args.modes or sorted(MODES):
+        barrier = threading.Barrier(len(programs))
+        threads = []
+        failures = []
+        for index, (source, order, output) in enumerate(programs):
+            options = dict(MODES[mode])
+            if "emit_python" in options:
+                options["emit_python"] = os.path.join(directory, "program" + str(index) + ".py")
+            interpreter = Interpreter(no_cache=True, **options)
+            threads.append(threading.Thread(target=run, args=(interpreter, source, order, output, args.repeat, barrier, failures)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print("{:<18} {}".format(mode, "ok" if not failures else str(len(failures)) + " failed runs, e.g. " + failures[0]))
+        failed = failed or len(failures) != 0
+
+if failed:
+    sys.exit(1)
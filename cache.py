@@ -0,0 +1,136 @@
+import os
+import mmap
+import struct
+import marshal
+try:
+    # The built-in SHA-256 is imported faster than hashlib, which loads OpenSSL
+    from _sha256 import sha256
+except ImportError:
+    from hashlib import sha256
+from arg import Arg
+from instruction import Instruction, OPCODES
+from program import Program
+from symtable import SCOPES
+import value
+
+# Compiled program file (.ippc):
+#   header: magic, format version, SHA-256 of the source XML
+#   body:   marshal of (opcode stream, operands, labels, GF variable names, TF/LF variable names, constant pool)
+# opcode stream is bytes, one opcode number (index to OPCODES) per instruction,
+# operands hold (datatype, frame, value, slot) of every argument with already decoded constants,
+# slot of a constant is its index in the constant pool of (type tag, value) pairs,
+# slot of a label operand is the index of its LABEL instruction,
+# labels map a label name to the index of its LABEL instruction
+MAGIC = b"IPPC"
+VERSION = 4
+HEADER = struct.Struct("<4sH32s")
+EXTENSION = ".ippc"
+DIRECTORY = "__ippcache__"
+
+def source_digest(source):
+    """ Returns SHA-256 of source XML (file name or bytes) """
+
+    digest = sha256()
+    if isinstance(source, bytes):
+        digest.update(source)
+    else:
+        with open(source, "rb") as source_file:
+            for chunk in iter(lambda: source_file.read(1 << 16), b""):
+                digest.update(chunk)
+    return digest.digest()
+
+def encode(program, digest):
+    """ Serializes a decoded program into compiled program file content """
+
+    opcodes = bytes(OPCODES.index(inst.opcode) for inst in program.instructions)
+    operands = tuple(tuple((arg.datatype, arg.frame, arg.value, arg.slot) for arg in (inst.arg1, inst.arg2, inst.arg3)[:inst.args])
+                     for inst in program.instructions)
+    return HEADER.pack(MAGIC, VERSION, digest) + \
+        marshal.dumps((opcodes, operands, program.labels, program.global_names, program.local_names,
+                       tuple((constant.type, constant.value) for constant in program.constants)))
+
+def decode_header(buffer):
+    """ Returns (magic, version, digest) of compiled program file content """
+
+    return HEADER.unpack_from(buffer, 0)
+
+def decode(buffer):
+    """ Deserializes compiled program file content (any buffer, e.g. mmap) into a Program """
+
+    opcodes, operands, labels, global_names, local_names, pool = marshal.loads(memoryview(buffer)[HEADER.size:])
+    constants = [value.constant(type, constant) for type, constant in pool]
+    instructions = []
+
+    for inst_order in range(0, len(opcodes)):
+        inst = Instruction(None)
+        inst.opcode = OPCODES[opcodes[inst_order]]
+        inst.order = inst_order + 1
+        inst.args = len(operands[inst_order])
+        args = []
+        for datatype, frame, text, slot in operands[inst_order]:
+            arg = Arg(None)
+            arg.datatype = datatype
+            arg.frame = frame
+            arg.value = text
+            arg.slot = slot
+            if frame != None:
+                arg.scope = SCOPES[frame]
+            elif datatype in value.TYPES:
+                arg.const = constants[slot]
+            args.append(arg)
+        args += [None] * (3 - len(args))
+        inst.arg1, inst.arg2, inst.arg3 = args
+        instructions.append(inst)
+
+    program = Program(instructions)
+    program.labels = labels
+    program.global_names = global_names
+    program.local_names = local_names
+    program.constants = constants
+    return program
+
+class Cache:
+    directory = None
+
+    def __init__(self, directory):
+        """ Cache of compiled programs stored in directory, file name is SHA-256 of the source XML """
+
+        self.directory = directory
+
+    def path(self, digest):
+        """ Returns path of the compiled program for source XML with given digest """
+
+        return os.path.join(self.directory, digest.hex() + EXTENSION)
+
+    def load(self, digest):
+        """ Memory-maps a compiled program, returns None if it doesn't exist or is not valid """
+
+        try:
+            with open(self.path(digest), "rb") as compiled_file:
+                with mmap.mmap(compiled_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    if len(buffer) < HEADER.size or decode_header(buffer) != (MAGIC, VERSION, digest):
+                        return None
+                    return decode(buffer)
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+
+    def store(self, program, digest):
+        """ Writes a compiled program, the cache is optional so failures are ignored """
+
+        # Imported only on a cache miss
+        import tempfile
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, "wb") as compiled_file:
+                compiled_file.write(encode(program, digest))
+            os.replace(tmp_path, self.path(digest))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
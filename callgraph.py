@@ -0,0 +1,138 @@
+# Fields of a call tree node
+NAME = 0
+PARENT = 1
+CHILDREN = 2
+COUNT = 3
+TIME = 4
+CALLS = 5
+
+# Frame of the code outside of any called label
+ROOT = "(program)"
+
+# Instructions of calls deeper than this are attributed to the deepest frame, so deep recursion keeps the tree
+# and the collapsed stacks small, the calls are counted per caller and callee
+MAX_DEPTH = 512
+
+class CallGraph:
+    root = None
+    node = None
+    depth = 0
+    overflow = None
+    deep_calls = None
+
+    def __init__(self):
+        """ Call tree of labels called by CALL, a shadow of Labels.call_stack kept by the profiling loop.
+        Every node is a list [name, parent, children by name, instructions, time, calls] and holds
+        the exclusive count and time of instructions executed in its frame """
+
+        self.root = [ROOT, None, {}, 0, 0, 1]
+        self.node = self.root
+        # Labels of the frames deeper than MAX_DEPTH and {(caller, callee): calls} of them
+        self.overflow = []
+        self.deep_calls = {}
+
+    def add(self, elapsed):
+        """ Attributes one executed instruction to the current frame """
+
+        node = self.node
+        node[COUNT] += 1
+        node[TIME] += elapsed
+
+    def call(self, label):
+        """ Enters the frame of a called label """
+
+        if self.depth == MAX_DEPTH:
+            caller = self.overflow[-1] if self.overflow else self.node[NAME]
+            self.deep_calls[caller, label] = self.deep_calls.get((caller, label), 0) + 1
+            self.overflow.append(label)
+            return
+        children = self.node[CHILDREN]
+        child = children.get(label)
+        if child == None:
+            child = [label, self.node, {}, 0, 0, 0]
+            children[label] = child
+        child[CALLS] += 1
+        self.node = child
+        self.depth += 1
+
+    def ret(self):
+        """ Leaves the current frame, RETURN without a frame (error 56) keeps the root """
+
+        if self.overflow:
+            self.overflow.pop()
+        elif self.node[PARENT] != None:
+            self.node = self.node[PARENT]
+            self.depth -= 1
+
+    def nodes(self):
+        """ Yields (node, stack of names from the root) of the whole tree without recursion """
+
+        pending = [(self.root, (ROOT,))]
+        while pending:
+            node, stack = pending.pop()
+            yield node, stack
+            for name in sorted(node[CHILDREN], reverse=True):
+                pending.append((node[CHILDREN][name], stack + (name,)))
+
+    def totals(self):
+        """ Returns a dictionary of node ids and their inclusive (count, time), computed bottom-up without recursion """
+
+        order = [node for node, stack in self.nodes()]
+        totals = {}
+        for node in reversed(order):
+            count = node[COUNT]
+            elapsed = node[TIME]
+            for child in node[CHILDREN].values():
+                child_count, child_time = totals[id(child)]
+                count += child_count
+                elapsed += child_time
+            totals[id(node)] = (count, elapsed)
+        return totals
+
+    def labels(self):
+        """ Returns {label: [calls, inclusive count, exclusive count, inclusive time, exclusive time]},
+        inclusive values of a recursive label count only its outermost frames, calls deeper than MAX_DEPTH are counted too """
+
+        totals = self.totals()
+        labels = {}
+        for node, stack in self.nodes():
+            name = node[NAME]
+            row = labels.setdefault(name, [0, 0, 0, 0, 0])
+            row[0] += node[CALLS]
+            row[2] += node[COUNT]
+            row[4] += node[TIME]
+            if name not in stack[:-1]:
+                count, elapsed = totals[id(node)]
+                row[1] += count
+                row[3] += elapsed
+        for (caller, callee), calls in self.deep_calls.items():
+            labels.setdefault(callee, [0, 0, 0, 0, 0])[0] += calls
+        return labels
+
+    def edges(self):
+        """ Returns {(caller, callee): [calls, inclusive count, inclusive time]}, inclusive values of recursive
+        calls count only the outermost frame of the callee, calls deeper than MAX_DEPTH are counted too """
+
+        totals = self.totals()
+        edges = {}
+        for node, stack in self.nodes():
+            if node[PARENT] == None:
+                continue
+            row = edges.setdefault((node[PARENT][NAME], node[NAME]), [0, 0, 0])
+            row[0] += node[CALLS]
+            if node[NAME] not in stack[:-1]:
+                count, elapsed = totals[id(node)]
+                row[1] += count
+                row[2] += elapsed
+        for (caller, callee), calls in self.deep_calls.items():
+            edges.setdefault((caller, callee), [0, 0, 0])[0] += calls
+        return edges
+
+    def write_collapsed(self, stream, weight="count"):
+        """ Writes stacks in the collapsed format of flamegraph.pl (frames separated by ; and the weight),
+        the weight is the exclusive instruction count or time in microseconds """
+
+        for node, stack in self.nodes():
+            value = node[COUNT] if weight == "count" else node[TIME] // 1000
+            if value != 0:
+                stream.write(";".join(stack) + " " + str(value) + "\n")
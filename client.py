@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import socket
+
+# Socket used if IPP_SOCKET is not set
+DEFAULT_SOCKET = "/tmp/ipp-interpret-" + str(os.getuid()) + ".sock"
+
+def socket_path():
+    """ Returns the socket path of the server, shared by server.py """
+
+    return os.environ.get("IPP_SOCKET", DEFAULT_SOCKET)
+
+def request(path, argv):
+    """ Runs interpret.py with the arguments by the server listening on path, stdin, stdout and stderr
+    are passed to the server, returns the exit code """
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(path)
+    message = "\0".join([os.getcwd()] + argv).encode("utf-8", "surrogateescape")
+    socket.send_fds(connection, [len(message).to_bytes(4, "big") + message], [0, 1, 2])
+
+    reply = b""
+    while not reply.endswith(b"\n"):
+        chunk = connection.recv(16)
+        if not chunk:
+            # The child was killed
+            return 1
+        reply += chunk
+    return int(reply)
+
+def main():
+    """ Command line interface of the server with the parameters of interpret.py, the program
+    is interpreted by this process if the server isn't running """
+
+    try:
+        return request(socket_path(), sys.argv[1:])
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+
+    import interpret
+    from error import IppError
+    try:
+        return interpret.main()
+    except IppError as error:
+        sys.stderr.write(error.report())
+        return error.code
+
+if __name__ == "__main__":
+    sys.exit(main())
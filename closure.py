@@ -0,0 +1,378 @@
+import operations
+from error import *
+from engine import Engine, ProgramExit
+from symtable import GF
+from value import INT
+
+# Operations of instructions compiled into specialized closures
+UNARY = {
+    "INT2CHAR": operations.int2char,
+    "STRLEN": operations.strlen,
+    "FLOAT2INT": operations.float2int,
+    "INT2FLOAT": operations.int2float,
+    "NOT": operations.not_,
+}
+BINARY = {
+    "ADD": operations.add,
+    "SUB": operations.sub,
+    "MUL": operations.mul,
+    "IDIV": operations.idiv,
+    "DIV": operations.div,
+    "LT": operations.lt,
+    "GT": operations.gt,
+    "EQ": operations.eq,
+    "AND": operations.and_,
+    "OR": operations.or_,
+    "STRI2INT": operations.stri2int,
+    "CONCAT": operations.concat,
+    "GETCHAR": operations.getchar,
+}
+UNARY_STACK = {
+    "INT2CHARS": operations.int2char,
+    "FLOAT2INTS": operations.float2int,
+    "INT2FLOATS": operations.int2float,
+    "NOTS": operations.not_,
+}
+BINARY_STACK = {
+    "ADDS": operations.add,
+    "SUBS": operations.sub,
+    "MULS": operations.mul,
+    "IDIVS": operations.idiv,
+    "DIVS": operations.div,
+    "LTS": operations.lt,
+    "GTS": operations.gt,
+    "EQS": operations.eq,
+    "ANDS": operations.and_,
+    "ORS": operations.or_,
+    "STRI2INTS": operations.stri2int,
+}
+
+class Break(Exception):
+    """ Raised by BREAK closure, the instruction is interpreted by the loop which knows the executed count """
+
+class ClosureEngine(Engine):
+    code = None
+    generic = None
+
+    def __init__(self, program, labels, symtable, input, output):
+        """ Engine compiling every instruction into a closure with its operands, frame slots and jump target
+        already bound, the closure takes no arguments and returns index of the next instruction """
+
+        Engine.__init__(self, program, labels, symtable, input, output)
+
+    def compile(self):
+        """ Compiles the program, instructions without a specialized closure call their Engine handler,
+        so handlers replaced by Optimizer are compiled as well """
+
+        self.code = []
+        # Instructions interpreted by a handler, they keep Engine.inst_order up to date
+        self.generic = bytearray(len(self.program))
+
+        for inst_order in range(0, len(self.program)):
+            inst = self.program[inst_order]
+            handler = self.handlers[inst_order]
+            if handler == self.dispatch[inst.opcode]:
+                closure = self.__specialize__(inst, inst_order)
+            else:
+                closure = None
+            if closure == None:
+                closure = self.__generic__(handler, inst, inst_order)
+                self.generic[inst_order] = 1
+            self.code.append(closure)
+
+    def __run__(self):
+        """ Main interpretation loop """
+
+        if self.code == None:
+            self.compile()
+
+        code = self.code
+        program_length = len(code)
+        pc = self.inst_order
+        executed = 0
+
+        # Current instruction and executed count are loop locals stored when the loop is left
+        try:
+            while pc < program_length:
+                try:
+                    while pc < program_length:
+                        pc = code[pc]()
+                        executed += 1
+                except Break:
+                    # Engine handler prints the executed count, BREAK itself is counted by the loop
+                    self.executed += executed
+                    executed = 1
+                    pc = self.brk(self.program[pc], pc)
+        except BaseException:
+            # Generic closures keep inst_order up to date themselves, also inside handlers fused by Optimizer
+            if not self.generic[pc]:
+                self.inst_order = pc
+            raise
+        finally:
+            self.executed += executed
+        self.inst_order = pc
+
+    ### Operand access ###
+    def getter(self, arg):
+        """ Returns a function returning value of a constant or an initialised variable """
+
+        symtable = self.symtable
+
+        if arg.scope == None:
+            const = arg.const
+            return lambda: const
+
+        slot = arg.slot
+        if arg.scope == GF:
+            values = symtable.glob.values
+
+            def get_global():
+                value = values[slot]
+                if value is None:
+                    return symtable.get_var(arg)
+                return value
+            return get_global
+
+        frames = symtable.frames
+        scope = arg.scope
+
+        def get_local():
+            frame = frames[scope]
+            if frame is not None:
+                value = frame.values[slot]
+                if value is not None:
+                    return value
+            return symtable.get_var(arg)
+        return get_local
+
+    def setter(self, arg):
+        """ Returns a function assigning a value to a variable """
+
+        symtable = self.symtable
+        slot = arg.slot
+
+        # Assignments are counted by SymTable for STATI --vars
+        if symtable.counting:
+            return lambda value: symtable.set_var(arg, value)
+
+        if arg.scope == GF:
+            values = symtable.glob.values
+            defined = symtable.glob.defined
+
+            def set_global(value):
+                if defined[slot]:
+                    values[slot] = value
+                else:
+                    symtable.set_var(arg, value)
+            return set_global
+
+        frames = symtable.frames
+        scope = arg.scope
+
+        def set_local(value):
+            frame = frames[scope]
+            if frame is not None and frame.defined[slot]:
+                frame.values[slot] = value
+            else:
+                symtable.set_var(arg, value)
+        return set_local
+
+    ### Closure compilation ###
+    def __generic__(self, handler, inst, inst_order):
+        """ Closure calling an Engine handler """
+
+        def run():
+            self.inst_order = inst_order
+            return handler(inst, inst_order)
+        return run
+
+    def __specialize__(self, inst, inst_order):
+        """ Returns a specialized closure of the instruction or None """
+
+        opcode = inst.opcode
+        next_pc = inst_order + 1
+        symtable = self.symtable
+        stack = symtable.var_stack
+
+        if opcode in BINARY:
+            return self.binary_closure(BINARY[opcode], inst, next_pc)
+        elif opcode in UNARY:
+            return self.unary_closure(UNARY[opcode], inst, next_pc)
+        elif opcode in BINARY_STACK:
+            return self.binary_stack_closure(BINARY_STACK[opcode], next_pc)
+        elif opcode in UNARY_STACK:
+            return self.unary_stack_closure(UNARY_STACK[opcode], next_pc)
+        elif opcode == "JUMPIFEQ" or opcode == "JUMPIFNEQ":
+            return self.jump_if_closure(opcode == "JUMPIFEQ", inst, next_pc)
+        elif opcode == "JUMPIFEQS" or opcode == "JUMPIFNEQS":
+            return self.jump_if_stack_closure(opcode == "JUMPIFEQS", inst, next_pc)
+
+        elif opcode == "LABEL":
+            return lambda: next_pc
+
+        elif opcode == "JUMP":
+            target = inst.arg1.slot + 1
+            return lambda: target
+
+        elif opcode == "CALL":
+            target = inst.arg1.slot + 1
+            call_stack = self.labels.call_stack
+
+            def call():
+                call_stack.append(inst_order)
+                return target
+            return call
+
+        elif opcode == "RETURN":
+            labels = self.labels
+            call_stack = labels.call_stack
+
+            def ret():
+                if call_stack:
+                    return call_stack.pop() + 1
+                return labels.ret() + 1
+            return ret
+
+        elif opcode == "MOVE":
+            set_x = self.setter(inst.arg1)
+            get_a = self.getter(inst.arg2)
+
+            def move():
+                set_x(get_a())
+                return next_pc
+            return move
+
+        elif opcode == "PUSHS":
+            push = stack.append
+            get_a = self.getter(inst.arg1)
+
+            def pushs():
+                push(get_a())
+                return next_pc
+            return pushs
+
+        elif opcode == "POPS":
+            set_x = self.setter(inst.arg1)
+
+            def pops():
+                if stack:
+                    set_x(stack.pop())
+                else:
+                    symtable.pops()
+                return next_pc
+            return pops
+
+        elif opcode == "WRITE":
+            write = self.output.write
+            get_a = self.getter(inst.arg1)
+
+            def write_value():
+                write(get_a().text())
+                return next_pc
+            return write_value
+
+        elif opcode == "EXIT":
+            get_a = self.getter(inst.arg1)
+
+            def exit_program():
+                exit_value = get_a()
+                if exit_value.type != INT:
+                    err.exit_script(err.operand_type)
+                if not 0 <= exit_value.value <= 49:
+                    err.exit_script(err.operand_value)
+                raise ProgramExit(exit_value.value)
+            return exit_program
+
+        elif opcode == "BREAK":
+            def brk():
+                raise Break()
+            return brk
+
+        return None
+
+    def unary_closure(self, operation, inst, next_pc):
+        """ var symb """
+
+        set_x = self.setter(inst.arg1)
+        get_a = self.getter(inst.arg2)
+
+        def run():
+            set_x(operation(get_a()))
+            return next_pc
+        return run
+
+    def binary_closure(self, operation, inst, next_pc):
+        """ var symb symb, the second operand is usually a constant """
+
+        set_x = self.setter(inst.arg1)
+        get_a = self.getter(inst.arg2)
+
+        if inst.arg3.scope == None:
+            const = inst.arg3.const
+
+            def run_const():
+                set_x(operation(get_a(), const))
+                return next_pc
+            return run_const
+
+        get_b = self.getter(inst.arg3)
+
+        def run():
+            set_x(operation(get_a(), get_b()))
+            return next_pc
+        return run
+
+    def unary_stack_closure(self, operation, next_pc):
+        """ Stack instruction with one operand """
+
+        stack = self.symtable.var_stack
+
+        def run():
+            if not stack:
+                err.exit_script(err.missing_value)
+            stack.append(operation(stack.pop()))
+            return next_pc
+        return run
+
+    def binary_stack_closure(self, operation, next_pc):
+        """ Stack instruction with two operands """
+
+        stack = self.symtable.var_stack
+
+        def run():
+            if len(stack) < 2:
+                err.exit_script(err.missing_value)
+            operand2 = stack.pop()
+            stack.append(operation(stack.pop(), operand2))
+            return next_pc
+        return run
+
+    def jump_if_closure(self, equal, inst, next_pc):
+        """ JUMPIFEQ (equal is True) or JUMPIFNEQ (equal is False) """
+
+        target = inst.arg1.slot + 1
+        condition = operations.jump_condition
+        get_a = self.getter(inst.arg2)
+        get_b = self.getter(inst.arg3)
+
+        def run():
+            if condition(get_a(), get_b()) == equal:
+                return target
+            return next_pc
+        return run
+
+    def jump_if_stack_closure(self, equal, inst, next_pc):
+        """ JUMPIFEQS (equal is True) or JUMPIFNEQS (equal is False) """
+
+        target = inst.arg1.slot + 1
+        condition = operations.jump_condition
+        stack = self.symtable.var_stack
+
+        def run():
+            if len(stack) < 2:
+                err.exit_script(err.missing_value)
+            operand2 = stack.pop()
+            if condition(stack.pop(), operand2) == equal:
+                return target
+            return next_pc
+        return run
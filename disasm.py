@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import sys
+import mmap
+import argparse
+import cache
+
+def disassemble(buffer, output):
+    """ Prints a compiled program in IPPcode19 syntax """
+
+    magic, version, digest = cache.decode_header(buffer)
+    if magic != cache.MAGIC:
+        sys.stderr.write("Not a compiled IPPcode19 program\n")
+        return 1
+
+    output.write("# format version: " + str(version) + "\n")
+    output.write("# source SHA-256: " + digest.hex() + "\n")
+    if version != cache.VERSION:
+        sys.stderr.write("Unsupported format version, expected " + str(cache.VERSION) + "\n")
+        return 1
+
+    program = cache.decode(buffer)
+    targets = dict()
+    for label, inst_order in program.labels.items():
+        targets[inst_order] = label
+
+    output.write(".IPPcode19\n")
+    for inst in program.instructions:
+        args = [arg.source() for arg in (inst.arg1, inst.arg2, inst.arg3)[:inst.args]]
+        output.write("{:>6}  {:<12}{}\n".format(inst.order, inst.opcode, " ".join(args)))
+
+    output.write("# labels:\n")
+    for inst_order in sorted(targets):
+        output.write("#   " + targets[inst_order] + " -> " + str(inst_order + 1) + "\n")
+    return 0
+
+
+parser = argparse.ArgumentParser(description="prints a compiled IPPcode19 program (" + cache.EXTENSION + " file)")
+parser.add_argument("file", help="compiled program")
+args = parser.parse_args()
+
+try:
+    with open(args.file, "rb") as compiled_file:
+        with mmap.mmap(compiled_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if len(buffer) < cache.HEADER.size:
+                sys.stderr.write("Not a compiled IPPcode19 program\n")
+                sys.exit(1)
+            sys.exit(disassemble(buffer, sys.stdout))
+except (OSError, ValueError) as error:
+    sys.stderr.write(str(error) + "\n")
+    sys.exit(1)
@@ -0,0 +1,382 @@
+import sys
+import operations
+from error import *
+from value import INT
+
+class ProgramExit(Exception):
+    """ Raised by EXIT instruction to stop the interpretation """
+
+    def __init__(self, code):
+        self.code = code
+
+class Engine:
+    program = None
+    labels = None
+    symtable = None
+    input = None
+    output = None
+    dispatch = None
+    handlers = None
+    inst_order = 0
+    executed = 0
+    exit_code = 0
+
+    def __init__(self, program, labels, symtable, input, output):
+        """ Maps every opcode to its handler once and binds a handler to every instruction of the program,
+        READ instructions read from input (see input.py), WRITE instructions write to output (see output.py) """
+
+        self.program = program
+        self.labels = labels
+        self.symtable = symtable
+        self.input = input
+        self.output = output
+
+        dispatch = {
+            "CREATEFRAME": self.create_frame,
+            "PUSHFRAME": self.push_frame,
+            "POPFRAME": self.pop_frame,
+            "RETURN": self.ret,
+            "BREAK": self.brk,
+            "CLEARS": self.clears,
+            "LABEL": self.label,
+
+            #1 arg: var
+            "DEFVAR": self.defvar,
+            "POPS": self.pops,
+
+            #1 arg: label
+            "JUMP": self.jump,
+            "CALL": self.call,
+
+            #1 arg: symb
+            "PUSHS": self.pushs,
+            "WRITE": self.write,
+            "EXIT": self.exit,
+            "DPRINT": self.dprint,
+
+            #2 arg: var symb
+            "MOVE": self.move,
+            "TYPE": self.type,
+            "INT2CHAR": self.unary(operations.int2char),
+            "STRLEN": self.unary(operations.strlen),
+            "FLOAT2INT": self.unary(operations.float2int),
+            "INT2FLOAT": self.unary(operations.int2float),
+            "NOT": self.unary(operations.not_),
+
+            #2 arg: var type
+            "READ": self.read,
+
+            #3 arg: var symb symb
+            "ADD": self.binary(operations.add),
+            "SUB": self.binary(operations.sub),
+            "MUL": self.binary(operations.mul),
+            "IDIV": self.binary(operations.idiv),
+            "DIV": self.binary(operations.div),
+            "LT": self.binary(operations.lt),
+            "GT": self.binary(operations.gt),
+            "EQ": self.binary(operations.eq),
+            "AND": self.binary(operations.and_),
+            "OR": self.binary(operations.or_),
+            "STRI2INT": self.binary(operations.stri2int),
+            "CONCAT": self.binary(operations.concat),
+            "GETCHAR": self.binary(operations.getchar),
+            "SETCHAR": self.setchar,
+
+            #3 arg: label symb symb
+            "JUMPIFEQ": self.jump_if(True),
+            "JUMPIFNEQ": self.jump_if(False),
+
+            # Stack variants
+            "INT2CHARS": self.unary_stack(operations.int2char),
+            "FLOAT2INTS": self.unary_stack(operations.float2int),
+            "INT2FLOATS": self.unary_stack(operations.int2float),
+            "NOTS": self.unary_stack(operations.not_),
+            "ADDS": self.binary_stack(operations.add),
+            "SUBS": self.binary_stack(operations.sub),
+            "MULS": self.binary_stack(operations.mul),
+            "IDIVS": self.binary_stack(operations.idiv),
+            "DIVS": self.binary_stack(operations.div),
+            "LTS": self.binary_stack(operations.lt),
+            "GTS": self.binary_stack(operations.gt),
+            "EQS": self.binary_stack(operations.eq),
+            "ANDS": self.binary_stack(operations.and_),
+            "ORS": self.binary_stack(operations.or_),
+            "STRI2INTS": self.binary_stack(operations.stri2int),
+            "JUMPIFEQS": self.jump_if_stack(True),
+            "JUMPIFNEQS": self.jump_if_stack(False),
+        }
+
+        self.dispatch = dispatch
+        self.handlers = [dispatch[inst.opcode] for inst in program]
+
+    def run(self, debug=False, count_vars=False, profiler=None, tracer=None):
+        """ Interpretes the program, returns exit code set by EXIT instruction or 0.
+        With a Profiler (profiler.py) or a Tracer (tracer.py) the program runs in a separate loop,
+        the main loop has no timer or trace calls """
+
+        # Initialised variables are counted by SymTable when they are assigned
+        if count_vars:
+            self.symtable.count_vars()
+
+        try:
+            if debug:
+                self.__run_debug__()
+            elif profiler != None:
+                self.__run_profile__(profiler)
+            elif tracer != None:
+                self.__run_trace__(tracer)
+            else:
+                self.__run__()
+        except ProgramExit as program_exit:
+            self.exit_code = program_exit.code
+        except IppError as error:
+            # The instruction is known to the loop which ran it
+            error.locate(self.locate())
+            raise
+        return self.exit_code
+
+    def __run__(self):
+        """ Main interpretation loop """
+
+        program = self.program
+        handlers = self.handlers
+        program_length = len(program)
+        inst_order = self.inst_order
+
+        while inst_order < program_length:
+            self.inst_order = inst_order
+            inst_order = handlers[inst_order](program[inst_order], inst_order)
+            self.executed += 1
+
+    def __run_debug__(self):
+        """ Interpretation loop used by debug mode """
+
+        program = self.program
+        handlers = self.handlers
+        program_length = len(program)
+        inst_order = self.inst_order
+
+        while inst_order < program_length:
+            self.inst_order = inst_order
+            self.output.flush()
+            program[inst_order].debug()
+            inst_order = handlers[inst_order](program[inst_order], inst_order)
+            self.executed += 1
+
+    def __run_profile__(self, profiler):
+        """ Interpretation loop used by --profile, measures every instruction """
+
+        program = self.program
+        handlers = self.handlers
+        program_length = len(program)
+        inst_order = self.inst_order
+        counts = profiler.counts
+        times = profiler.times
+        clock = profiler.clock
+        # Shadow of the call stack, CALL is attributed to the caller and RETURN to the callee
+        graph = profiler.graph
+
+        begin = clock()
+        start = begin
+        try:
+            while inst_order < program_length:
+                self.inst_order = inst_order
+                inst = program[inst_order]
+                start = clock()
+                next_order = handlers[inst_order](inst, inst_order)
+                elapsed = clock() - start
+                times[inst_order] += elapsed
+                counts[inst_order] += 1
+                graph.add(elapsed)
+                if inst.opcode == "CALL":
+                    graph.call(inst.arg1.value)
+                elif inst.opcode == "RETURN":
+                    graph.ret()
+                inst_order = next_order
+                self.executed += 1
+        except BaseException:
+            # EXIT and the instruction which failed are measured too
+            elapsed = clock() - start
+            times[inst_order] += elapsed
+            counts[inst_order] += 1
+            graph.add(elapsed)
+            raise
+        finally:
+            profiler.elapsed += clock() - begin
+
+    def __run_trace__(self, tracer):
+        """ Interpretation loop used by --trace, records every instruction before it is executed """
+
+        program = self.program
+        handlers = self.handlers
+        program_length = len(program)
+        inst_order = self.inst_order
+        record = tracer.record
+        # SymTable changes the frames in place
+        frames = self.symtable.frames
+
+        while inst_order < program_length:
+            self.inst_order = inst_order
+            record(inst_order, frames)
+            inst_order = handlers[inst_order](program[inst_order], inst_order)
+            self.executed += 1
+
+    def locate(self):
+        """ Returns order of the instruction being interpreted, used in error messages """
+
+        return self.inst_order + 1
+
+    ### Handler factories ###
+    def unary(self, operation):
+        """ Creates a handler of instruction with format: var symb """
+
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            symtable.set_var(inst.arg1, operation(symtable.get_value(inst.arg2)))
+            return inst_order + 1
+        return handler
+
+    def binary(self, operation):
+        """ Creates a handler of instruction with format: var symb symb """
+
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            symtable.set_var(inst.arg1, operation(symtable.get_value(inst.arg2), symtable.get_value(inst.arg3)))
+            return inst_order + 1
+        return handler
+
+    def unary_stack(self, operation):
+        """ Creates a handler of stack instruction with one operand """
+
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            symtable.var_stack.append(operation(symtable.pops()))
+            return inst_order + 1
+        return handler
+
+    def binary_stack(self, operation):
+        """ Creates a handler of stack instruction with two operands """
+
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            operand2 = symtable.pops()
+            operand1 = symtable.pops()
+            symtable.var_stack.append(operation(operand1, operand2))
+            return inst_order + 1
+        return handler
+
+    def jump_if(self, equal):
+        """ Creates a handler of JUMPIFEQ (equal is True) or JUMPIFNEQ (equal is False) """
+
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            if operations.jump_condition(symtable.get_value(inst.arg2), symtable.get_value(inst.arg3)) == equal:
+                return inst.arg1.slot + 1
+            return inst_order + 1
+        return handler
+
+    def jump_if_stack(self, equal):
+        """ Creates a handler of JUMPIFEQS (equal is True) or JUMPIFNEQS (equal is False) """
+
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            operand2 = symtable.pops()
+            operand1 = symtable.pops()
+            if operations.jump_condition(operand1, operand2) == equal:
+                return inst.arg1.slot + 1
+            return inst_order + 1
+        return handler
+
+    ### Handlers ###
+    def create_frame(self, inst, inst_order):
+        self.symtable.create_frame()
+        return inst_order + 1
+
+    def push_frame(self, inst, inst_order):
+        self.symtable.push_frame()
+        return inst_order + 1
+
+    def pop_frame(self, inst, inst_order):
+        self.symtable.pop_frame()
+        return inst_order + 1
+
+    def ret(self, inst, inst_order):
+        return self.labels.ret() + 1
+
+    def brk(self, inst, inst_order):
+        self.output.flush()
+        sys.stderr.write("Instructions order: " + str(inst_order + 1) + "\n")
+        sys.stderr.write("Instructions executed: " + str(self.executed + 1) + "\n")
+        self.symtable.print()
+        return inst_order + 1
+
+    def clears(self, inst, inst_order):
+        self.symtable.clears()
+        return inst_order + 1
+
+    def label(self, inst, inst_order):
+        return inst_order + 1
+
+    def defvar(self, inst, inst_order):
+        self.symtable.defvar(inst.arg1)
+        return inst_order + 1
+
+    def pops(self, inst, inst_order):
+        self.symtable.set_var(inst.arg1, self.symtable.pops())
+        return inst_order + 1
+
+    def jump(self, inst, inst_order):
+        return inst.arg1.slot + 1
+
+    def call(self, inst, inst_order):
+        return self.labels.call(inst.arg1, inst_order) + 1
+
+    def pushs(self, inst, inst_order):
+        self.symtable.pushs(inst.arg1)
+        return inst_order + 1
+
+    def write(self, inst, inst_order):
+        self.output.write(self.symtable.get_value(inst.arg1).text())
+        return inst_order + 1
+
+    def exit(self, inst, inst_order):
+        exit_value = self.symtable.get_value(inst.arg1)
+
+        if exit_value.type == INT:
+            if 0 <= exit_value.value <= 49:
+                raise ProgramExit(exit_value.value)
+            else:
+                err.exit_script(err.operand_value)
+        else:
+            err.exit_script(err.operand_type)
+
+    def dprint(self, inst, inst_order):
+        self.output.flush()
+        self.symtable.get_value(inst.arg1).write(sys.stderr)
+        return inst_order + 1
+
+    def move(self, inst, inst_order):
+        self.symtable.set_var(inst.arg1, self.symtable.get_value(inst.arg2))
+        return inst_order + 1
+
+    def type(self, inst, inst_order):
+        self.symtable.set_var(inst.arg1, operations.type_of(self.symtable.get_var_even_uninitialised(inst.arg2)))
+        return inst_order + 1
+
+    def read(self, inst, inst_order):
+        self.output.before_read()
+        self.symtable.set_var(inst.arg1, self.input.read(inst.arg2.value))
+        return inst_order + 1
+
+    def setchar(self, inst, inst_order):
+        operand1 = self.symtable.get_value(inst.arg2)
+        operand2 = self.symtable.get_value(inst.arg3)
+        result = operations.setchar(self.symtable.get_var(inst.arg1), operand1, operand2)
+        self.symtable.set_var(inst.arg1, result)
+        return inst_order + 1
@@ -1,5 +1,27 @@
 import sys
-import inspect
+
+class IppError(Exception):
+    """ Error of the interpreter input or of the interpreted program, code is the return code of the interpreter,
+    caller describes where the error was detected """
+
+    def __init__(self, code, inst_order, message, caller):
+        Exception.__init__(self, message)
+        self.code = code
+        self.inst_order = inst_order
+        self.message = message
+        self.caller = caller
+
+    def locate(self, inst_order):
+        """ Sets order of the instruction where the error occurred, called by the loop which ran the instruction """
+
+        self.inst_order = inst_order
+        self.message = err.message(self.code, inst_order)
+        self.args = (self.message,)
+
+    def report(self):
+        """ Returns the text printed to stderr by the command line interpreter """
+
+        return self.caller + "\n" + self.message + "\n"
 
 class Error:
     missing_parameter = 10
@@ -15,49 +37,55 @@ class Error:
     operand_value = 57
     string_operation = 58
     runtime = 99
-    inst_order = 0
 
-    def exit_script(self, errcode):
-        """ Exits the interpreter in case of an error and prints some information to stderr """
-    
+    def exit_script(self, errcode, inst_order=0):
+        """ Stops the interpreter in case of an error by raising IppError with the error code,
+        errors of a running program are located by the loop which ran the instruction """
+
+        # inspect is imported only on the error path, it is one of the slowest modules to import
+        import inspect
+
         curframe = inspect.currentframe()
         calframe = inspect.getouterframes(curframe, 2)
-        sys.stderr.write("Error called by method: " + calframe[1][3])
+        caller = "Error called by method: " + calframe[1][3]
 
         frame_records = inspect.stack()
         calling_module = inspect.getmodulename(frame_records[1][1])
-        sys.stderr.write(" in module: " + calling_module)
-        
-        sys.stderr.write(" on line: " + str(frame_records[1][2]) + "\n")
+        caller += " in module: " + calling_module
+
+        caller += " on line: " + str(frame_records[1][2])
+
+        raise IppError(errcode, inst_order, self.message(errcode, inst_order), caller)
+
+    def message(self, errcode, inst_order):
+        """ Returns the error message of the error code """
 
         if errcode == self.missing_parameter:
-            sys.stderr.write("Error: Invalid input parameters\n")
+            return "Error: Invalid input parameters"
         elif errcode == self.input_file:
-            sys.stderr.write("Error: Invalid input file\n")
+            return "Error: Invalid input file"
         elif errcode == self.output_file:
-            sys.stderr.write("Error: Invalid output file\n")
+            return "Error: Invalid output file"
         elif errcode == self.xml:
-            sys.stderr.write("Error: XML not well-formed\n")
+            return "Error: XML not well-formed"
         elif errcode == self.lexical_or_syntax:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + ": Lexical or syntax\n")
+            return "Error at inst " + str(inst_order) + ": Lexical or syntax"
         elif errcode == self.semantics:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + ": Semantic error of input code\n")
+            return "Error at inst " + str(inst_order) + ": Semantic error of input code"
         elif errcode == self.operand_type:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + ": Incompatible operand types\n")
+            return "Error at inst " + str(inst_order) + ": Incompatible operand types"
         elif errcode == self.undef_var:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + ": Using undefined variable\n")
+            return "Error at inst " + str(inst_order) + ": Using undefined variable"
         elif errcode == self.undef_frame:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + ": Using undefined frame\n")
+            return "Error at inst " + str(inst_order) + ": Using undefined frame"
         elif errcode == self.missing_value:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + ": Missing value\n")
+            return "Error at inst " + str(inst_order) + ": Missing value"
         elif errcode == self.operand_value:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + ": Invalid operand value\n")
+            return "Error at inst " + str(inst_order) + ": Invalid operand value"
         elif errcode == self.string_operation:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + ": Invalid string operation\n")
+            return "Error at inst " + str(inst_order) + ": Invalid string operation"
         elif errcode == self.runtime:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + ": Runtime\n")
-        else:
-            sys.stderr.write("Error at inst " + str(self.inst_order) + "\n")
-        exit(errcode)
+            return "Error at inst " + str(inst_order) + ": Runtime"
+        return "Error at inst " + str(inst_order)
 
 err = Error()
@@ -0,0 +1,121 @@
+import os
+import sys
+import mmap
+import stat
+from value import Value, INT, STRING, FLOAT, TRUE, FALSE
+
+# Approximate amount of input bytes split into lines at once
+BLOCK_SIZE = 1 << 20
+
+class Input:
+    data = None
+    position = 0
+    lines = None
+    index = 0
+    stream = None
+    interactive = False
+    encoding = None
+    universal_newlines = False
+
+    def __init__(self, data, encoding, universal_newlines, stream=None):
+        """ Input of READ instructions. data (bytes or mmap) of the whole input is split into lines by blocks
+        of whole lines, so a READ only takes the next line of the current block. If data is None, the stream
+        is read as one block at the first READ, an interactive stream (tty) is read line by line.
+        With universal_newlines CRLF and CR end a line as in a text file opened by open(),
+        otherwise only LF does as in sys.stdin """
+
+        self.encoding = encoding
+        self.universal_newlines = universal_newlines
+        self.stream = stream
+        self.lines = []
+        if data != None:
+            self.__load__(data)
+        elif stream != None:
+            self.interactive = stream.isatty()
+
+    def __load__(self, data):
+        """ Sets data of the whole input """
+
+        if self.universal_newlines and data.find(b"\r") != -1:
+            data = bytes(data).replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        self.data = data
+
+    def __refill__(self):
+        """ Returns the next line when the current block is exhausted, None at the end of input """
+
+        if self.data == None:
+            if self.interactive:
+                line = self.stream.readline()
+                if not line:
+                    return None
+                return line[:-1] if line.endswith(b"\n") else line
+            self.__load__(self.stream.read())
+
+        data = self.data
+        start = self.position
+        if start >= len(data):
+            return None
+
+        end = data.find(b"\n", start + BLOCK_SIZE)
+        if end == -1:
+            end = len(data)
+            if data[end - 1:end] == b"\n":
+                # The last line is terminated
+                end -= 1
+        self.lines = data[start:end].split(b"\n")
+        self.position = end + 1
+        self.index = 1
+        return self.lines[0]
+
+    def read(self, datatype):
+        """ Converts the next line to a value of datatype (READ), the conversion is done on the bytes of the line,
+        missing or invalid input results in the default value of the type """
+
+        index = self.index
+        if index < len(self.lines):
+            line = self.lines[index]
+            self.index = index + 1
+        else:
+            line = self.__refill__()
+
+        if datatype == "int":
+            if line != None:
+                digits = line[1:] if line[:1] in (b"+", b"-") else line
+                # bytes.isdigit accepts only ASCII digits
+                if digits.isdigit():
+                    return Value(INT, int(line))
+            return Value(INT, 0)
+        elif datatype == "bool":
+            return TRUE if line != None and line.upper() == b"TRUE" else FALSE
+        elif datatype == "string":
+            return Value(STRING, line.decode(self.encoding) if line != None else "")
+        else:
+            if line != None:
+                try:
+                    return Value(FLOAT, float.fromhex(line.decode(self.encoding)))
+                except ValueError:
+                    pass
+            return Value(FLOAT, 0.0)
+
+def file_input(path):
+    """ Returns Input of a memory-mapped file (pipes and empty files are read), raises OSError if the file can't be read """
+
+    # Text mode gives the encoding of open() (locale.getpreferredencoding) without importing locale
+    with open(path) as input_file:
+        encoding = input_file.encoding
+        status = os.fstat(input_file.fileno())
+        if stat.S_ISREG(status.st_mode) and status.st_size != 0:
+            data = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = input_file.buffer.read()
+    return Input(data, encoding, True)
+
+def stream_input(stream, encoding="utf-8"):
+    """ Returns Input of a binary stream, read as one block at the first READ unless it's interactive """
+
+    return Input(None, encoding, False, stream)
+
+def standard_input():
+    """ Returns Input of stdin """
+
+    return stream_input(sys.stdin.buffer, sys.stdin.encoding)
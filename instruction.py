@@ -1,66 +1,72 @@
-import re
 import sys
 from error import *
 from arg import Arg
 
+# All valid opcodes, position of an opcode is its number in compiled programs
+OPCODES = ("CREATEFRAME", "PUSHFRAME", "POPFRAME", "RETURN", "BREAK", "CLEARS",
+           "ADDS", "SUBS", "MULS", "IDIVS", "DIVS", "LTS", "GTS", "EQS", "ANDS", "ORS", "NOTS",
+           "INT2CHARS", "FLOAT2INTS", "INT2FLOATS", "STRI2INTS",
+           "DEFVAR", "POPS",
+           "LABEL", "JUMP", "CALL", "JUMPIFEQS", "JUMPIFNEQS",
+           "PUSHS", "WRITE", "EXIT", "DPRINT",
+           "MOVE", "INT2CHAR", "INT2FLOAT", "FLOAT2INT", "STRLEN", "TYPE", "NOT",
+           "READ",
+           "ADD", "SUB", "MUL", "IDIV", "DIV", "LT", "GT", "EQ", "AND", "OR", "STRI2INT", "CONCAT", "GETCHAR", "SETCHAR",
+           "JUMPIFEQ", "JUMPIFNEQ")
+
 class Instruction:
-    opcode = None
-    arg1 = None
-    arg2 = None
-    arg3 = None
-    args = 0
+    __slots__ = ("opcode", "order", "arg1", "arg2", "arg3", "args")
 
     def __init__(self, xml):
-        """ Extracts values from <instruction> XML element and performs lexical and syntax analysis """
+        """ Extracts values from <instruction> XML element and performs lexical and syntax analysis
+        if the parameter is None it will define empty Instruction """
+
+        self.opcode = None
+        self.order = 0
+        self.arg1 = None
+        self.arg2 = None
+        self.arg3 = None
+        self.args = 0
+
+        if xml == None:
+            return
+        if "opcode" not in xml.attrib:
+            err.exit_script(err.lexical_or_syntax)
 
-        if "opcode" not in xml.attributes:
+        if len(xml.attrib) != 2:
             err.exit_script(err.lexical_or_syntax)
 
-        if len(xml.attributes) != 2:
+        self.opcode = xml.attrib["opcode"]
+
+        # Check for excessive text inside instruction element
+        if xml.text != None and not xml.text.isspace():
             err.exit_script(err.lexical_or_syntax)
 
-        self.opcode = xml.attributes["opcode"].value
-        arg1 = xml.getElementsByTagName("arg1")
-        arg2 = xml.getElementsByTagName("arg2")
-        arg3 = xml.getElementsByTagName("arg3")
-
-        arg1_found = False
-        arg2_found = False
-        arg3_found = False
-        for arg in xml.childNodes:
-            # Check for excessive text inside instruction element
-            if arg.nodeType == arg.TEXT_NODE:
-                if (not arg.nodeValue.isspace()):
-                    err.exit_script(err.lexical_or_syntax)
-            
+        arg1 = None
+        arg2 = None
+        arg3 = None
+        for arg in xml:
+            if arg.tail != None and not arg.tail.isspace():
+                err.exit_script(err.lexical_or_syntax)
+
             # Check for duplicite argN elements
-            elif arg.nodeType == arg.ELEMENT_NODE:
-                if arg.localName == "arg1":
-                    if arg1_found == False:
-                        arg1_found = True
-                    else:
-                        err.exit_script(err.lexical_or_syntax)
-                elif arg.localName == "arg2":
-                    if arg2_found == False:
-                        arg2_found = True
-                    else:
-                        err.exit_script(err.lexical_or_syntax)
-                elif arg.localName == "arg3":
-                    if arg3_found == False:
-                        arg3_found = True
-                    else:
-                        err.exit_script(err.lexical_or_syntax)
-                else:
-                    err.exit_script(err.lexical_or_syntax)
-
-        if len(arg1) == 1:
-            self.arg1 = Arg(arg1[0])
+            if arg.tag == "arg1" and arg1 == None:
+                arg1 = arg
+            elif arg.tag == "arg2" and arg2 == None:
+                arg2 = arg
+            elif arg.tag == "arg3" and arg3 == None:
+                arg3 = arg
+            else:
+                err.exit_script(err.lexical_or_syntax)
+
+        if arg1 != None:
+            self.arg1 = Arg(arg1)
             self.args = 1 
-        if len(arg2) == 1:
-            self.arg2 = Arg(arg2[0])
+        if arg2 != None:
+            self.arg2 = Arg(arg2)
             self.args = 2 
-        if len(arg3) == 1:
-            self.arg3 = Arg(arg3[0])
+        if arg3 != None:
+            self.arg3 = Arg(arg3)
             self.args = 3
 
         if self.opcode == "CREATEFRAME" or \
@@ -181,6 +187,11 @@ class Instruction:
         elif self.args == 3:
             print("= Instruction: [", self.opcode, "]\t[", self.arg1.datatype, " : ", self.arg1.frame, " : ", self.arg1.value, "]\t[", self.arg2.datatype, " : ", self.arg2.frame, " : ", self.arg2.value, "]\t[", self.arg3.datatype, " : ", self.arg3.frame, " : ", self.arg3.value, "]", sep='', end='')
 
+    def source(self):
+        """ Returns the instruction in IPPcode19 syntax """
+
+        return " ".join([self.opcode] + [arg.source() for arg in (self.arg1, self.arg2, self.arg3)[:self.args]])
+
     def debug(self):
         """ Interpretes instructions step by step for debugging purposes """
 
@@ -0,0 +1,247 @@
+import io
+import os
+import sys
+import cache
+from error import *
+from symtable import SymTable
+from program import Program
+from cache import Cache
+from labels import Labels
+from engine import Engine
+from input import Input, file_input, stream_input, standard_input
+from output import Output, standard_output, BUFFER_SIZE, EXIT
+# Loader (xml.etree), ClosureEngine, Optimizer, Jit and Translator are imported when they are used,
+# a program run from the cache by the default engine imports only the modules above
+
+ENGINES = ("default", "closure")
+
+class Interpreter:
+    engine = "default"
+    optimize = False
+    jit = False
+    jit_threshold = 100
+    jit_stats = False
+    count_vars = False
+    debug = False
+    emit_python = None
+    output_buffer = BUFFER_SIZE
+    flush = EXIT
+    cache_dir = None
+    no_cache = False
+    rebuild_cache = False
+    profile = None
+    profile_format = "text"
+    profile_sort = "time"
+    profile_top = 20
+    profile_stacks = None
+    profile_weight = "count"
+    trace = 0
+    trace_file = None
+
+    def __init__(self, engine="default", optimize=False, jit=False, jit_threshold=100, jit_stats=False, count_vars=False,
+                 debug=False, emit_python=None, output_buffer=BUFFER_SIZE, flush=EXIT, cache_dir=None, no_cache=False,
+                 rebuild_cache=False, profile=None, profile_format="text", profile_sort="time", profile_top=20,
+                 profile_stacks=None, profile_weight="count", trace=0, trace_file=None):
+        """ Embeddable IPPcode19 interpreter, the options correspond to the parameters of interpret.py.
+        Every run creates its own symbol table, call stack and engine, so one instance can run any amount
+        of programs one after another and errors raise IppError instead of ending the process """
+
+        if engine not in ENGINES:
+            raise ValueError("unknown engine " + repr(engine))
+        self.engine = engine
+        self.optimize = optimize
+        self.jit = jit
+        self.jit_threshold = jit_threshold
+        self.jit_stats = jit_stats
+        self.count_vars = count_vars
+        self.debug = debug
+        self.emit_python = emit_python
+        self.output_buffer = output_buffer
+        self.flush = flush
+        self.cache_dir = cache_dir
+        self.no_cache = no_cache
+        self.rebuild_cache = rebuild_cache
+        self.profile = profile
+        self.profile_format = profile_format
+        self.profile_sort = profile_sort
+        self.profile_top = profile_top
+        self.profile_stacks = profile_stacks
+        self.profile_weight = profile_weight
+        self.trace = trace
+        self.trace_file = trace_file
+
+    def load(self, source):
+        """ Loads a program from an XML file name, XML bytes or a binary stream, compiled programs are looked up
+        by SHA-256 of the source XML in the cache (see cache.py). A stream is cached only if cache_dir is set """
+
+        if not isinstance(source, (str, bytes)) and self.cache_dir != None and not self.no_cache:
+            # The whole source has to be read to compute its digest
+            source = source.read()
+
+        program_cache = None
+        if isinstance(source, (str, bytes)) and not self.no_cache:
+            try:
+                digest = cache.source_digest(source)
+                if self.cache_dir != None:
+                    program_cache = Cache(self.cache_dir)
+                elif isinstance(source, str):
+                    program_cache = Cache(os.path.join(os.path.dirname(os.path.abspath(source)), cache.DIRECTORY))
+            except OSError:
+                # Missing source file is reported by Loader
+                program_cache = None
+
+        if program_cache != None and not self.rebuild_cache:
+            program = program_cache.load(digest)
+            if program != None:
+                return program
+
+        # The source is parsed and checked in one streaming pass, see Loader
+        from loader import Loader
+        if isinstance(source, bytes):
+            program = Program(Loader().load(io.BytesIO(source)))
+        else:
+            program = Program(Loader().load(source))
+        program.define_labels()
+        program.link_labels()
+        program.resolve_variables()
+        program.resolve_constants()
+
+        if program_cache != None:
+            program_cache.store(program, digest)
+        return program
+
+    def run(self, program, stdin=None, stdout=None):
+        """ Runs a Program (or a source accepted by load) and returns (exit code, executed instructions,
+        maximum of initialised variables). stdin is an input file name, bytes, a binary stream or Input,
+        stdout a binary stream or Output, sys.stdin and sys.stdout are used if not set.
+        Errors raise IppError, the output written before the error is flushed """
+
+        if not isinstance(program, Program):
+            program = self.load(program)
+        program_input = self.__input__(stdin)
+        program_output = self.__output__(stdout)
+
+        try:
+            if self.emit_python != None:
+                return self.__translate__(program, program_input, program_output)
+            return self.__interpret__(program, program_input, program_output)
+        finally:
+            program_output.flush()
+
+    def __input__(self, stdin):
+        """ Returns Input of READ instructions """
+
+        if isinstance(stdin, Input):
+            return stdin
+        elif stdin == None:
+            return standard_input()
+        elif isinstance(stdin, str):
+            try:
+                return file_input(stdin)
+            except OSError:
+                err.exit_script(err.input_file)
+        elif isinstance(stdin, bytes):
+            return Input(stdin, "utf-8", False)
+        return stream_input(stdin)
+
+    def __output__(self, stdout):
+        """ Returns Output of WRITE instructions """
+
+        if isinstance(stdout, Output):
+            return stdout
+        elif stdout == None:
+            return standard_output(self.output_buffer, self.flush)
+        return Output(stdout, size=self.output_buffer, policy=self.flush)
+
+    def __translate__(self, program, program_input, program_output):
+        """ Translates the program into a Python module written to emit_python and runs it """
+
+        import translator
+        python_source = translator.Translator(program, self.count_vars).translate()
+        try:
+            with open(self.emit_python, "w") as python_file:
+                python_file.write(python_source)
+        except OSError:
+            err.exit_script(err.output_file)
+        namespace = translator.load(python_source, os.path.abspath(self.emit_python))
+        return translator.execute(namespace, program_input, program_output)
+
+    def __interpret__(self, program, program_input, program_output):
+        """ Interpretes the program by the selected engine """
+
+        if self.engine == "closure":
+            from closure import ClosureEngine
+            engine_class = ClosureEngine
+        else:
+            engine_class = Engine
+        engine = engine_class(program.instructions, Labels(program.labels), SymTable(program.global_names, program.local_names),
+                              program_input, program_output)
+
+        # Profiled programs are interpreted instruction by instruction, without fusions and traces
+        profiler = None
+        profile_file = None
+        stacks_file = None
+        if (self.profile != None or self.profile_stacks != None) and not self.debug:
+            from profiler import Profiler
+            profiler = Profiler(len(program.instructions))
+            # The files are opened before the run as the --stats file is
+            profile_file = self.__open_profile__(self.profile)
+            stacks_file = self.__open_profile__(self.profile_stacks)
+
+        # Traced programs are interpreted instruction by instruction as well, profiling takes precedence
+        tracer = None
+        trace_file = None
+        if (self.trace > 0 or self.trace_file != None) and not self.debug and profiler == None:
+            from tracer import Tracer
+            if self.trace_file != None:
+                try:
+                    trace_file = open(self.trace_file, "wb")
+                except OSError:
+                    err.exit_script(err.output_file)
+            tracer = Tracer(program.instructions, self.trace, trace_file)
+
+        jit = None
+        if self.jit and self.engine == "default" and not self.debug and not self.count_vars and profiler == None and tracer == None:
+            # Traces specialize the loops themselves, fused handlers are not used
+            from jit import Jit
+            jit = Jit(engine, self.jit_threshold)
+            jit.install()
+        elif self.optimize and not self.debug and profiler == None and tracer == None:
+            from optimizer import Optimizer
+            optimizer = Optimizer(engine)
+            optimizer.optimize()
+            optimizer.log()
+
+        try:
+            exit_code = engine.run(self.debug, self.count_vars, profiler, tracer)
+        except IppError:
+            # Debug mode and profiling run without a Tracer
+            if tracer != None and self.trace > 0:
+                tracer.dump(output=program_output)
+            raise
+        finally:
+            # The trace file is complete also if the program ended by an error
+            if trace_file != None:
+                with trace_file:
+                    tracer.flush()
+            # The profile is written also if the program ended by an error
+            if profile_file != None:
+                with profile_file:
+                    profiler.report(program.instructions, profile_file, self.profile_format, self.profile_sort, self.profile_top)
+            if stacks_file != None:
+                with stacks_file:
+                    profiler.write_stacks(stacks_file, self.profile_weight)
+        if jit != None and self.jit_stats:
+            program_output.flush()
+            jit.print_stats(sys.stderr)
+        return exit_code, engine.executed, engine.symtable.max_defined_vars
+
+    def __open_profile__(self, path):
+        """ Opens an output file of the profiler, returns None if the path is not set """
+
+        if path == None:
+            return None
+        try:
+            return open(path, "w")
+        except OSError:
+            err.exit_script(err.output_file)
@@ -0,0 +1,388 @@
+from error import *
+from symtable import GF
+from value import Value, INT, BOOL, STRING, FLOAT, TRUE, FALSE
+
+# Jumps whose backward targets are counted as loop back-edges
+JUMPS = ("JUMP", "JUMPIFEQ", "JUMPIFNEQ", "JUMPIFEQS", "JUMPIFNEQS")
+
+# Instructions ending the recording of a trace, the loop is not compiled
+UNTRACEABLE = ("EXIT", "BREAK")
+
+# Longest recorded trace (nested loops are unrolled into the trace of the outer loop)
+MAX_TRACE = 500
+
+# Specialized three-address instructions, opcode -> {operand types: Python expression of the result}
+ARITHMETIC = {
+    "ADD": {(INT, INT): "Value(INT, a.value + b.value)", (FLOAT, FLOAT): "Value(FLOAT, a.value + b.value)"},
+    "SUB": {(INT, INT): "Value(INT, a.value - b.value)", (FLOAT, FLOAT): "Value(FLOAT, a.value - b.value)"},
+    "MUL": {(INT, INT): "Value(INT, a.value * b.value)", (FLOAT, FLOAT): "Value(FLOAT, a.value * b.value)"},
+    "LT": {(INT, INT): "TRUE if a.value < b.value else FALSE", (STRING, STRING): "TRUE if a.value < b.value else FALSE",
+           (BOOL, BOOL): "TRUE if a.value < b.value else FALSE"},
+    "GT": {(INT, INT): "TRUE if a.value > b.value else FALSE", (STRING, STRING): "TRUE if a.value > b.value else FALSE",
+           (BOOL, BOOL): "TRUE if a.value > b.value else FALSE"},
+    "EQ": {(INT, INT): "TRUE if a.value == b.value else FALSE", (STRING, STRING): "TRUE if a.value == b.value else FALSE",
+           (BOOL, BOOL): "TRUE if a.value == b.value else FALSE"},
+    "CONCAT": {(STRING, STRING): "a.concat(b)"},
+}
+
+# Kinds of trace exits
+GUARD = "guard"
+BRANCH = "branch"
+HANDLER = "handler"
+
+class Trace:
+    """ Compiled loop, a tree of recorded paths starting at the loop header and ending by a jump back to it """
+
+    __slots__ = ("header", "paths", "function", "entries", "executed", "exit_points", "exit_counts", "last_exit", "extended")
+
+    def __init__(self, header, records):
+        self.header = header
+        # Recorded paths, the root path is (), a side path starting at a branch exit
+        # of path p at position i is p + (i,)
+        self.paths = {(): records}
+        self.function = None
+        self.entries = 0
+        self.executed = 0
+        # Exit points of the compiled function (path, position, kind) and leaves through them
+        self.exit_points = []
+        self.exit_counts = dict()
+        self.last_exit = None
+        # Exits for which a side path was recorded
+        self.extended = set()
+
+class Jit:
+    engine = None
+    threshold = 0
+    traces = None
+    aborted = None
+    # Trace being compiled, path and position of the compiled instruction in it
+    # and the amount of instructions of the iteration interpreted before it
+    trace = None
+    path = None
+    position = 0
+    executed = 0
+    inst_order = 0
+
+    def __init__(self, engine, threshold):
+        """ Tracing JIT of a program bound to an Engine, a loop is compiled after threshold back-edge jumps to its header,
+        a branch leaving a compiled loop threshold times is compiled as its side path """
+
+        self.engine = engine
+        self.threshold = threshold
+        self.traces = dict()
+        self.aborted = set()
+
+    def install(self):
+        """ Replaces handlers of backward jumps by handlers counting the taken back-edges """
+
+        program = self.engine.program
+        handlers = self.engine.handlers
+
+        for inst_order in range(0, len(program)):
+            inst = program[inst_order]
+            if inst.opcode in JUMPS and inst.arg1.slot < inst_order and inst.arg1.slot + 1 < len(program):
+                # Jumps continue after the LABEL instruction
+                handlers[inst_order] = self.__back_edge__(handlers[inst_order], inst.arg1.slot + 1)
+
+    def __back_edge__(self, handler, header):
+        """ Creates a handler of a backward jump to header """
+
+        threshold = self.threshold
+        counter = [0]
+
+        def counting(inst, inst_order):
+            next_order = handler(inst, inst_order)
+            if next_order == header and counter[0] >= 0:
+                counter[0] += 1
+                if counter[0] >= threshold:
+                    counter[0] = -1
+                    next_order = self.__hot__(header)
+            return next_order
+        return counting
+
+    def __hot__(self, header):
+        """ Records one iteration of a hot loop and compiles it, returns index of the next instruction """
+
+        if header in self.traces or header in self.aborted:
+            return header
+
+        next_order, records = self.__record__(header, header)
+        if records == None:
+            self.aborted.add(header)
+        else:
+            trace = Trace(header, records)
+            self.__compile__(trace)
+            self.traces[header] = trace
+            self.engine.handlers[header] = self.__entry__(trace, self.engine.handlers[header])
+        return next_order
+
+    def __extend__(self, trace, exit_point, start):
+        """ Records a side path from a hot branch exit and compiles the trace again, returns index of the next instruction """
+
+        path, position, kind = exit_point
+        trace.extended.add(exit_point)
+        next_order, records = self.__record__(start, trace.header)
+        if records != None:
+            trace.paths[path + (position,)] = records
+            self.__compile__(trace)
+        return next_order
+
+    ### Recording ###
+    def __record__(self, start, header):
+        """ Interpretes instructions from start until the loop jumps back to header,
+        returns (next inst_order, recorded (inst_order, operand types, next inst_order)) or records None if aborted """
+
+        engine = self.engine
+        program = engine.program
+        dispatch = engine.dispatch
+        records = []
+        inst_order = start
+
+        while inst_order < len(program) and len(records) < MAX_TRACE:
+            inst = program[inst_order]
+            if inst.opcode in UNTRACEABLE:
+                break
+
+            types = self.__types__(inst)
+            engine.inst_order = inst_order
+            next_order = dispatch[inst.opcode](inst, inst_order)
+            engine.executed += 1
+            records.append((inst_order, types, next_order))
+
+            if next_order == header and inst.opcode in JUMPS:
+                return next_order, records
+            inst_order = next_order
+
+        return inst_order, None
+
+    def __types__(self, inst):
+        """ Returns runtime types of the operands (None for uninitialised variables and other operands) """
+
+        types = []
+        for arg in (inst.arg1, inst.arg2, inst.arg3)[:inst.args]:
+            if arg.const is not None:
+                types.append(arg.const.type)
+            elif arg.scope is not None:
+                frame = self.engine.symtable.frames[arg.scope]
+                if frame is not None and frame.values[arg.slot] is not None:
+                    types.append(frame.values[arg.slot].type)
+                else:
+                    types.append(None)
+            else:
+                types.append(None)
+        return types
+
+    ### Compilation ###
+    def __compile__(self, trace):
+        """ Generates a Python function interpreting the recorded paths in a loop, the function
+        returns (next inst_order, executed instructions) when a guard fails or the loop ends """
+
+        engine = self.engine
+        symtable = engine.symtable
+        namespace = {
+            "Value": Value, "INT": INT, "STRING": STRING, "FLOAT": FLOAT, "TRUE": TRUE, "FALSE": FALSE,
+            "GV": symtable.glob.values, "GD": symtable.glob.defined, "FRAMES": symtable.frames,
+            "STACK": symtable.var_stack, "ENGINE": engine, "LEAVE": self.__leave__(trace),
+        }
+        lines = [
+            "def trace():",
+            "    gv = GV",
+            "    gd = GD",
+            "    frames = FRAMES",
+            "    stack = STACK",
+            "    engine = ENGINE",
+            "    leave = LEAVE",
+            "    n = 0",
+            "    while True:",
+        ]
+
+        self.trace = trace
+        trace.exit_points = []
+        self.__path__((), 0, lines, "        ", namespace)
+
+        name = "<trace " + str(engine.program[trace.header].order) + ">"
+        exec(compile("\n".join(lines) + "\n", name, "exec"), namespace)
+        trace.function = namespace["trace"]
+
+    def __path__(self, path, executed, lines, indent, namespace):
+        """ Generates code of a recorded path, executed is the amount of instructions of the iteration before the path """
+
+        records = self.trace.paths[path]
+        for position in range(0, len(records)):
+            inst_order, types, next_order = records[position]
+            inst = self.engine.program[inst_order]
+            self.path = path
+            self.position = position
+            self.executed = executed + position
+            lines.append(indent + "# " + str(inst.order) + " " + inst.opcode)
+
+            code = self.__specialize__(inst, inst_order, types, next_order, namespace)
+            if code == None:
+                code = self.__generic__(inst, inst_order, next_order, namespace)
+            lines += [indent + line for line in code]
+
+            if path + (position,) in self.trace.paths:
+                # The branch continues by its side path instead of leaving the trace
+                self.__path__(path + (position,), executed + position + 1, lines, indent + "    ", namespace)
+
+        lines.append(indent + "n += " + str(executed + len(records)))
+        if path != ():
+            lines.append(indent + "continue")
+
+    def __side_exit__(self, kind, inst_order, executed):
+        """ Returns statement leaving the trace to inst_order, executed is the amount of instructions
+        of the current iteration interpreted before leaving """
+
+        self.trace.exit_points.append((self.path, self.position, kind))
+        return "return leave(" + str(len(self.trace.exit_points) - 1) + ", " + str(inst_order) + ", n + " + str(executed) + ")"
+
+    def __leave__(self, trace):
+        """ Creates a function counting leaves through exit points of a trace """
+
+        exit_counts = trace.exit_counts
+
+        def leave(exit_index, inst_order, executed):
+            exit_point = trace.exit_points[exit_index]
+            trace.last_exit = exit_point
+            exit_counts[exit_point] = exit_counts.get(exit_point, 0) + 1
+            return inst_order, executed
+        return leave
+
+    def __read__(self, arg, name, datatype, namespace):
+        """ Returns lines reading an operand into name, guarded by its recorded type (any type if datatype is None),
+        the trace is left before the instruction if the guard fails """
+
+        if arg.const is not None:
+            constant = "K" + str(arg.slot)
+            namespace[constant] = arg.const
+            return [name + " = " + constant]
+
+        guard_exit = self.__side_exit__(GUARD, self.inst_order, self.executed)
+        if arg.scope == GF:
+            lines = [name + " = gv[" + str(arg.slot) + "]"]
+        else:
+            lines = ["frame = frames[" + str(arg.scope) + "]",
+                     "if frame is None:",
+                     "    " + guard_exit,
+                     name + " = frame.values[" + str(arg.slot) + "]"]
+        if datatype == None:
+            lines += ["if " + name + " is None:"]
+        else:
+            lines += ["if " + name + " is None or " + name + ".type != " + str(datatype) + ":"]
+        return lines + ["    " + guard_exit]
+
+    def __write__(self, arg, expression):
+        """ Returns lines writing an expression to a variable, guarded by definition of the variable """
+
+        guard_exit = self.__side_exit__(GUARD, self.inst_order, self.executed)
+        if arg.scope == GF:
+            return ["if not gd[" + str(arg.slot) + "]:",
+                    "    " + guard_exit,
+                    "gv[" + str(arg.slot) + "] = " + expression]
+        return ["frame = frames[" + str(arg.scope) + "]",
+                "if frame is None or not frame.defined[" + str(arg.slot) + "]:",
+                "    " + guard_exit,
+                "frame.values[" + str(arg.slot) + "] = " + expression]
+
+    def __specialize__(self, inst, inst_order, types, next_order, namespace):
+        """ Returns lines of an instruction specialized for the recorded types or None """
+
+        opcode = inst.opcode
+        self.inst_order = inst_order
+
+        if opcode == "LABEL" or opcode == "JUMP":
+            return []
+
+        elif opcode == "MOVE":
+            return self.__read__(inst.arg2, "a", None, namespace) + self.__write__(inst.arg1, "a")
+
+        elif opcode in ARITHMETIC and (types[1], types[2]) in ARITHMETIC[opcode]:
+            return self.__read__(inst.arg2, "a", types[1], namespace) + \
+                self.__read__(inst.arg3, "b", types[2], namespace) + \
+                self.__write__(inst.arg1, ARITHMETIC[opcode][(types[1], types[2])])
+
+        elif (opcode == "JUMPIFEQ" or opcode == "JUMPIFNEQ") and types[1] == types[2] and types[1] not in (None, FLOAT):
+            taken = next_order != inst_order + 1
+            other = inst_order + 1 if taken else inst.arg1.slot + 1
+            # Condition of the direction not taken during recording
+            if (opcode == "JUMPIFEQ") == taken:
+                condition = "a.value != b.value"
+            else:
+                condition = "a.value == b.value"
+            lines = self.__read__(inst.arg2, "a", types[1], namespace) + \
+                self.__read__(inst.arg3, "b", types[2], namespace) + \
+                ["if " + condition + ":"]
+            if self.path + (self.position,) in self.trace.paths:
+                # The body is the side path of the branch
+                return lines
+            return lines + ["    " + self.__side_exit__(BRANCH, other, self.executed + 1)]
+
+        elif opcode == "PUSHS":
+            return self.__read__(inst.arg1, "a", None, namespace) + ["stack.append(a)"]
+
+        elif opcode == "POPS":
+            return ["if not stack:",
+                    "    " + self.__side_exit__(GUARD, inst_order, self.executed)] + \
+                self.__write__(inst.arg1, "stack.pop()")
+
+        return None
+
+    def __generic__(self, inst, inst_order, next_order, namespace):
+        """ Returns lines calling the Engine handler of an instruction, the trace is left
+        if the handler continues elsewhere than during recording """
+
+        handler = "H" + str(inst_order)
+        instruction = "I" + str(inst_order)
+        namespace[handler] = self.engine.dispatch[inst.opcode]
+        namespace[instruction] = inst
+        return ["engine.inst_order = " + str(inst_order),
+                "next_order = " + handler + "(" + instruction + ", " + str(inst_order) + ")",
+                "if next_order != " + str(next_order) + ":",
+                "    " + self.__side_exit__(HANDLER, "next_order", self.executed + 1)]
+
+    def __entry__(self, trace, handler):
+        """ Creates a handler of the loop header running the compiled trace """
+
+        engine = self.engine
+        threshold = self.threshold
+
+        def entry(inst, inst_order):
+            next_order, executed = trace.function()
+            trace.entries += 1
+            if executed == 0:
+                # A guard failed at the header, the instruction is interpreted
+                return handler(inst, inst_order)
+
+            trace.executed += executed
+            # The main loop counts one instruction
+            engine.executed += executed - 1
+            exit_point = trace.last_exit
+            if exit_point[2] == BRANCH and trace.exit_counts[exit_point] >= threshold and exit_point not in trace.extended:
+                next_order = self.__extend__(trace, exit_point, next_order)
+            return next_order
+        return entry
+
+    ### Statistics ###
+    def print_stats(self, file):
+        """ Prints compiled traces, their exits and guard failure rates """
+
+        program = self.engine.program
+        file.write("JIT: " + str(len(self.traces)) + " traces compiled, " + str(len(self.aborted)) + " loops not compiled\n")
+        for header in sorted(self.traces):
+            trace = self.traces[header]
+            guard_failures = 0
+            for exit_point, count in trace.exit_counts.items():
+                if exit_point[2] != BRANCH:
+                    guard_failures += count
+            rate = guard_failures / trace.entries if trace.entries != 0 else 0.0
+            file.write("JIT: trace at inst " + str(program[header].order) + ": " + str(len(trace.paths[()])) + " insts, "
+                       + str(len(trace.paths) - 1) + " side paths, " + str(trace.entries) + " entries, "
+                       + str(trace.executed) + " insts executed, " + str(guard_failures)
+                       + " guard failures ({:.1%} of entries)\n".format(rate))
+            for exit_point in sorted(trace.exit_counts):
+                path, position, kind = exit_point
+                inst_order = trace.paths[path][position][0]
+                file.write("JIT:   exit at inst " + str(program[inst_order].order) + " (" + kind + "): "
+                           + str(trace.exit_counts[exit_point]) + "\n")
+        for header in sorted(self.aborted):
+            file.write("JIT: loop at inst " + str(program[header].order) + " not compiled\n")
@@ -1,29 +1,21 @@
 from error import *
 
 class Labels:
-    labels = dict()
-    call_stack = []
+    labels = None
+    call_stack = None
 
-    def jump(self, arg):
-        """ Jumps to a label (returns order of a label) """
+    def __init__(self, labels):
+        """ Uses a dictionary of labels defined by Program, the call stack belongs to one run of the program """
 
-        if arg.value in self.labels:
-            return self.labels[arg.value]
-        else:
-            err.exit_script(err.semantics)
-    
-    def add(self, arg, inst_order):
-        """ Adds a new label to a dictionary of labels """
+        self.labels = labels
+        self.call_stack = []
 
-        if arg.value in self.labels:
-            err.exit_script(err.semantics)
-        self.labels[arg.value] = inst_order
-    
     def call(self, arg, inst_order):
-        """ Adds current position to a call stack and jumps to a label """
+        """ Adds current position to a call stack and jumps to a label (returns index of the label),
+        label operands are linked to their target by Program.link_labels """
 
         self.call_stack.append(inst_order)
-        return self.jump(arg)
+        return arg.slot
     
     def ret(self):
         """ Pops a value from call stack """
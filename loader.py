@@ -0,0 +1,102 @@
+from xml.etree import ElementTree
+from error import *
+from instruction import Instruction
+
+class Loader:
+    instructions = None
+    root = None
+    previous = None
+    inst_order = 0
+
+    def load(self, source):
+        """ Reads source XML (file name or binary stream) in one streaming pass and returns instructions sorted by order,
+        every element is dropped as soon as its instruction is decoded """
+
+        self.instructions = dict()
+        self.root = None
+        self.previous = None
+        self.inst_order = 0
+        depth = 0
+
+        try:
+            for event, elem in ElementTree.iterparse(source, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 1:
+                        self.__check_program__(elem)
+                    elif depth == 2:
+                        self.__release_previous__()
+                        if elem.tag != "instruction":
+                            err.exit_script(err.lexical_or_syntax)
+                    elif depth > 3:
+                        # Only <argN> elements are allowed inside an instruction
+                        err.exit_script(err.lexical_or_syntax)
+                else:
+                    if depth == 2:
+                        self.__decode__(elem)
+                        self.previous = elem
+                    elif depth == 1:
+                        self.__release_previous__()
+                    depth -= 1
+        except (ElementTree.ParseError, OSError):
+            err.exit_script(err.xml)
+        except IppError as error:
+            # Errors are located at the instruction being decoded
+            error.locate(self.inst_order)
+            raise
+
+        return self.__sorted__()
+
+    def __check_program__(self, elem):
+        """ Checks for language="IPPcode19" of the root element """
+
+        self.root = elem
+        if "language" not in elem.attrib:
+            err.exit_script(err.lexical_or_syntax)
+        if elem.attrib["language"] != "IPPcode19":
+            err.exit_script(err.lexical_or_syntax)
+
+    def __release_previous__(self):
+        """ Checks for excessive text after the last instruction element (or after the program start tag)
+        and removes the already decoded element from the tree """
+
+        if self.previous == None:
+            text = self.root.text
+        else:
+            text = self.previous.tail
+            self.root.remove(self.previous)
+            self.previous = None
+
+        if text != None and not text.isspace():
+            err.exit_script(err.lexical_or_syntax)
+
+    def __decode__(self, elem):
+        """ Checks order attribute of an instruction element and decodes the instruction """
+
+        self.inst_order = len(self.instructions) + 1
+        if "order" not in elem.attrib:
+            err.exit_script(err.lexical_or_syntax)
+        try:
+            order = int(elem.attrib["order"])
+        except ValueError:
+            err.exit_script(err.lexical_or_syntax)
+
+        # Check for duplicite or invalid order
+        if order < 1 or order in self.instructions:
+            err.exit_script(err.lexical_or_syntax)
+
+        self.inst_order = order
+        inst = Instruction(elem)
+        inst.order = order
+        self.instructions[order] = inst
+
+    def __sorted__(self):
+        """ Checks for valid order sequence (starts at 1, no number is skipped) and sorts instructions by order """
+
+        # Orders are unique positive numbers, the sequence is valid if the highest order equals their count
+        if len(self.instructions) > 0 and max(self.instructions) != len(self.instructions):
+            err.exit_script(err.lexical_or_syntax, self.inst_order)
+
+        instructions = self.instructions
+        self.instructions = None
+        return [instructions[order] for order in range(1, len(instructions) + 1)]
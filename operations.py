@@ -0,0 +1,166 @@
+from error import *
+from value import Value, INT, BOOL, STRING, FLOAT, NIL, TYPE_NAMES, TRUE, FALSE
+
+# Operations shared by three-address instructions and their stack (...S) variants,
+# each one checks operand types and returns a Value with the result
+
+def add(operand1, operand2):
+    """ ADD, ADDS """
+
+    if operand1.type == operand2.type and (operand1.type == INT or operand1.type == FLOAT):
+        return Value(operand1.type, operand1.value + operand2.value)
+    err.exit_script(err.operand_type)
+
+def sub(operand1, operand2):
+    """ SUB, SUBS """
+
+    if operand1.type == operand2.type and (operand1.type == INT or operand1.type == FLOAT):
+        return Value(operand1.type, operand1.value - operand2.value)
+    err.exit_script(err.operand_type)
+
+def mul(operand1, operand2):
+    """ MUL, MULS """
+
+    if operand1.type == operand2.type and (operand1.type == INT or operand1.type == FLOAT):
+        return Value(operand1.type, operand1.value * operand2.value)
+    err.exit_script(err.operand_type)
+
+def idiv(operand1, operand2):
+    """ IDIV, IDIVS """
+
+    if operand1.type == INT and operand2.type == INT:
+        if operand2.value == 0:
+            err.exit_script(err.operand_value)
+        return Value(INT, operand1.value // operand2.value)
+    err.exit_script(err.operand_type)
+
+def div(operand1, operand2):
+    """ DIV, DIVS """
+
+    if operand1.type == FLOAT and operand2.type == FLOAT:
+        if operand2.value == 0:
+            err.exit_script(err.operand_value)
+        return Value(FLOAT, operand1.value / operand2.value)
+    err.exit_script(err.operand_type)
+
+def lt(operand1, operand2):
+    """ LT, LTS, bool values are compared as false < true """
+
+    if operand1.type == operand2.type and (operand1.type == INT or operand1.type == BOOL or operand1.type == STRING):
+        return TRUE if operand1.value < operand2.value else FALSE
+    err.exit_script(err.operand_type)
+
+def gt(operand1, operand2):
+    """ GT, GTS """
+
+    if operand1.type == operand2.type and (operand1.type == INT or operand1.type == BOOL or operand1.type == STRING):
+        return TRUE if operand1.value > operand2.value else FALSE
+    err.exit_script(err.operand_type)
+
+def eq(operand1, operand2):
+    """ EQ, EQS, nil can be compared with any type """
+
+    if operand1.type == operand2.type and operand1.type != FLOAT:
+        return TRUE if operand1.value == operand2.value else FALSE
+    elif operand1.type == NIL or operand2.type == NIL:
+        return FALSE
+    err.exit_script(err.operand_type)
+
+def and_(operand1, operand2):
+    """ AND, ANDS """
+
+    if operand1.type == BOOL and operand2.type == BOOL:
+        return TRUE if operand1.value and operand2.value else FALSE
+    err.exit_script(err.operand_type)
+
+def or_(operand1, operand2):
+    """ OR, ORS """
+
+    if operand1.type == BOOL and operand2.type == BOOL:
+        return TRUE if operand1.value or operand2.value else FALSE
+    err.exit_script(err.operand_type)
+
+def not_(operand1):
+    """ NOT, NOTS """
+
+    if operand1.type == BOOL:
+        return FALSE if operand1.value else TRUE
+    err.exit_script(err.operand_type)
+
+def int2char(operand1):
+    """ INT2CHAR, INT2CHARS """
+
+    if operand1.type == INT:
+        if 0 <= operand1.value <= 1114111:
+            return Value(STRING, chr(operand1.value))
+        err.exit_script(err.string_operation)
+    err.exit_script(err.operand_type)
+
+def stri2int(operand1, operand2):
+    """ STRI2INT, STRI2INTS """
+
+    if operand1.type == STRING and operand2.type == INT:
+        if 0 <= operand2.value < operand1.length():
+            return Value(INT, ord(operand1.char(operand2.value)))
+        err.exit_script(err.string_operation)
+    err.exit_script(err.operand_type)
+
+def float2int(operand1):
+    """ FLOAT2INT, FLOAT2INTS """
+
+    if operand1.type == FLOAT:
+        return Value(INT, int(operand1.value))
+    err.exit_script(err.operand_type)
+
+def int2float(operand1):
+    """ INT2FLOAT, INT2FLOATS """
+
+    if operand1.type == INT:
+        return Value(FLOAT, float(operand1.value))
+    err.exit_script(err.operand_type)
+
+def strlen(operand1):
+    """ STRLEN """
+
+    if operand1.type == STRING:
+        return Value(INT, operand1.length())
+    err.exit_script(err.operand_type)
+
+def concat(operand1, operand2):
+    """ CONCAT """
+
+    if operand1.type == STRING and operand2.type == STRING:
+        return operand1.concat(operand2)
+    err.exit_script(err.operand_type)
+
+def getchar(operand1, operand2):
+    """ GETCHAR """
+
+    if operand1.type == STRING and operand2.type == INT:
+        if 0 <= operand2.value < operand1.length():
+            return Value(STRING, operand1.char(operand2.value))
+        err.exit_script(err.string_operation)
+    err.exit_script(err.operand_type)
+
+def setchar(string, operand1, operand2):
+    """ SETCHAR, returns a new string, the original value stays untouched """
+
+    if string.type == STRING and operand1.type == INT and operand2.type == STRING:
+        if 0 <= operand1.value < string.length() and operand2.length() > 0:
+            return string.setchar(operand1.value, operand2.char(0))
+        err.exit_script(err.string_operation)
+    err.exit_script(err.operand_type)
+
+def type_of(src_var):
+    """ TYPE, src_var is None for an uninitialised variable """
+
+    if src_var == None:
+        return Value(STRING, "")
+    return Value(STRING, TYPE_NAMES[src_var.type])
+
+def jump_condition(operand1, operand2):
+    """ JUMPIFEQ(S), JUMPIFNEQ(S), returns whether the operands are equal """
+
+    if operand1.type == operand2.type and operand1.type != FLOAT:
+        return operand1.value == operand2.value
+    err.exit_script(err.operand_type)
@@ -0,0 +1,305 @@
+import operations
+from error import *
+
+# Stack instructions fused with their PUSHS operands and POPS result into a three-address operation
+BINARY_STACK = {
+    "ADDS": operations.add,
+    "SUBS": operations.sub,
+    "MULS": operations.mul,
+    "IDIVS": operations.idiv,
+    "DIVS": operations.div,
+    "LTS": operations.lt,
+    "GTS": operations.gt,
+    "EQS": operations.eq,
+    "ANDS": operations.and_,
+    "ORS": operations.or_,
+    "STRI2INTS": operations.stri2int,
+}
+UNARY_STACK = {
+    "NOTS": operations.not_,
+    "INT2CHARS": operations.int2char,
+    "FLOAT2INTS": operations.float2int,
+    "INT2FLOATS": operations.int2float,
+}
+
+# Conditional jumps of the stack extension, they end a stack region
+STACK_JUMPS = {"JUMPIFEQS": True, "JUMPIFNEQS": False}
+
+# Comparisons fused with a following conditional jump on their result
+COMPARISONS = {
+    "LT": operations.lt,
+    "GT": operations.gt,
+    "EQ": operations.eq,
+}
+
+class Optimizer:
+    engine = None
+    symtable = None
+    labels = None
+    fusions = None
+
+    def __init__(self, engine):
+        """ Peephole optimizer of a program bound to an Engine """
+
+        self.engine = engine
+        self.symtable = engine.symtable
+        self.labels = engine.labels
+        self.fusions = []
+
+    def optimize(self):
+        """ Replaces the handler of the first instruction of every recognised sequence by a fused handler,
+        which interpretes the whole sequence and continues after it. Other instructions of the sequence
+        keep their handlers and indices, so jump targets, error codes and --insts count stay the same """
+
+        program = self.engine.program
+        handlers = self.engine.handlers
+        inst_order = 0
+
+        while inst_order < len(program):
+            fused = self.__match__(program, inst_order)
+            if fused == None:
+                inst_order += 1
+                continue
+
+            length, name, handler = fused
+            handlers[inst_order] = handler
+            self.fusions.append((inst_order, length, name))
+            inst_order += length
+        return self.fusions
+
+    def log(self):
+        """ Prints applied fusions to stderr """
+
+        program = self.engine.program
+        for inst_order, length, name in self.fusions:
+            sequence = " ".join(inst.opcode for inst in program[inst_order:inst_order + length])
+            sys.stderr.write("Optimizer: inst " + str(inst_order + 1) + ": " + sequence + " -> " + name + "\n")
+        sys.stderr.write("Optimizer: " + str(len(self.fusions)) + " fusions applied\n")
+
+    def __match__(self, program, inst_order):
+        """ Returns (length, name, handler) of a fusion starting at inst_order or None """
+
+        opcodes = [inst.opcode for inst in program[inst_order:inst_order + 4]]
+        insts = program[inst_order:inst_order + 4]
+
+        # A stack region replaces the patterns below only if it is longer than them
+        length = self.__stack_region__(program, inst_order)
+        fused = self.__match_pattern__(program, inst_order, opcodes, insts)
+        if length != None and (fused == None or length > fused[0]):
+            return length, "REGISTERS", self.stack_region(program, inst_order, length)
+        return fused
+
+    def __match_pattern__(self, program, inst_order, opcodes, insts):
+        """ Returns (length, name, handler) of a fixed pattern starting at inst_order or None """
+
+        if opcodes[:2] == ["PUSHS", "PUSHS"] and len(opcodes) == 4 and opcodes[2] in BINARY_STACK and opcodes[3] == "POPS":
+            return 4, opcodes[2][:-1], self.binary_stack(BINARY_STACK[opcodes[2]], insts[0].arg1, insts[1].arg1, insts[3].arg1)
+
+        if opcodes[:1] == ["PUSHS"] and len(opcodes) >= 3 and opcodes[1] in UNARY_STACK and opcodes[2] == "POPS":
+            return 3, opcodes[1][:-1], self.unary_stack(UNARY_STACK[opcodes[1]], insts[0].arg1, insts[2].arg1)
+
+        if opcodes[:2] == ["PUSHS", "POPS"]:
+            return 2, "MOVE", self.move(insts[0].arg1, insts[1].arg1)
+
+        if len(opcodes) >= 2 and opcodes[0] in COMPARISONS and opcodes[1] in ("JUMPIFEQ", "JUMPIFNEQ"):
+            condition = self.__condition__(insts[0].arg1, insts[1])
+            if condition != None:
+                return 2, "CMPJUMP", \
+                    self.compare_and_branch(COMPARISONS[opcodes[0]], insts[0], insts[1].arg1.slot, opcodes[1] == "JUMPIFEQ", condition)
+
+        if opcodes[:2] == ["CREATEFRAME", "PUSHFRAME"]:
+            return 2, "NEWFRAME", self.new_frame()
+
+        if opcodes[:2] == ["POPFRAME", "RETURN"]:
+            return 2, "RETFRAME", self.return_frame()
+
+        return None
+
+    def __stack_region__(self, program, inst_order):
+        """ Returns length of the longest sequence of stack instructions starting at inst_order which leaves
+        the stack as it found it and never pops a value pushed before it, None if there is no such sequence
+        of two instructions at least. The sequence contains no LABEL, so it is a part of one basic block, and it may end by JUMPIFEQS
+        or JUMPIFNEQS """
+
+        depth = 0
+        length = 0
+        position = inst_order
+        while position < len(program):
+            opcode = program[position].opcode
+            if opcode == "PUSHS":
+                depth += 1
+            elif opcode == "POPS" and depth >= 1:
+                depth -= 1
+            elif opcode in UNARY_STACK and depth >= 1:
+                pass
+            elif opcode in BINARY_STACK and depth >= 2:
+                depth -= 1
+            elif opcode in STACK_JUMPS and depth >= 2:
+                depth -= 2
+            else:
+                break
+            position += 1
+            if depth == 0:
+                length = position - inst_order
+            if opcode in STACK_JUMPS:
+                break
+        if length < 2:
+            return None
+        return length
+
+    def __condition__(self, result, jump):
+        """ Returns the bool constant a conditional jump compares the result variable with,
+        None if the jump compares something else """
+
+        for tested, constant in ((jump.arg2, jump.arg3), (jump.arg3, jump.arg2)):
+            if tested.datatype == "var" and tested.scope == result.scope and tested.slot == result.slot \
+               and constant.datatype == "bool":
+                return constant.const
+        return None
+
+    ### Fused handler factories ###
+    def binary_stack(self, operation, arg_a, arg_b, arg_x):
+        """ PUSHS a; PUSHS b; <binary stack instruction>; POPS x """
+
+        engine = self.engine
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            operand1 = symtable.get_value(arg_a)
+            engine.inst_order = inst_order + 1
+            operand2 = symtable.get_value(arg_b)
+            engine.inst_order = inst_order + 2
+            result = operation(operand1, operand2)
+            engine.inst_order = inst_order + 3
+            symtable.set_var(arg_x, result)
+            engine.executed += 3
+            return inst_order + 4
+        return handler
+
+    def unary_stack(self, operation, arg_a, arg_x):
+        """ PUSHS a; <unary stack instruction>; POPS x """
+
+        engine = self.engine
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            operand1 = symtable.get_value(arg_a)
+            engine.inst_order = inst_order + 1
+            result = operation(operand1)
+            engine.inst_order = inst_order + 2
+            symtable.set_var(arg_x, result)
+            engine.executed += 2
+            return inst_order + 3
+        return handler
+
+    def move(self, arg_a, arg_x):
+        """ PUSHS a; POPS x """
+
+        engine = self.engine
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            operand1 = symtable.get_value(arg_a)
+            engine.inst_order = inst_order + 1
+            symtable.set_var(arg_x, operand1)
+            engine.executed += 1
+            return inst_order + 2
+        return handler
+
+    def stack_region(self, program, inst_order, length):
+        """ Closed stack region found by __stack_region__, values of the stack are kept in local variables
+        r0, r1, ... (one for every depth) of a generated handler instead of SymTable.var_stack.
+        The region never pops a value it has not pushed, so the stack underflow (error 56) cannot happen
+        in it and the stack below it is not touched. engine.inst_order is set before every step which
+        may fail, so errors are reported at the same instruction """
+
+        namespace = {"engine": self.engine, "get_value": self.symtable.get_value, "set_var": self.symtable.set_var,
+                     "jump_condition": operations.jump_condition}
+        lines = ["def handler(inst, inst_order):"]
+        depth = 0
+        for position in range(inst_order, inst_order + length):
+            inst = program[position]
+            opcode = inst.opcode
+            name = str(position)
+            lines.append("    # " + str(inst.order) + " " + opcode)
+            if opcode == "PUSHS" and inst.arg1.const is not None:
+                namespace["K" + name] = inst.arg1.const
+                lines.append("    r" + str(depth) + " = K" + name)
+                depth += 1
+                continue
+
+            if position != inst_order:
+                lines.append("    engine.inst_order = " + name)
+            if opcode == "PUSHS":
+                namespace["A" + name] = inst.arg1
+                lines.append("    r" + str(depth) + " = get_value(A" + name + ")")
+                depth += 1
+            elif opcode == "POPS":
+                depth -= 1
+                namespace["A" + name] = inst.arg1
+                lines.append("    set_var(A" + name + ", r" + str(depth) + ")")
+            elif opcode in UNARY_STACK:
+                namespace["F" + name] = UNARY_STACK[opcode]
+                lines.append("    r" + str(depth - 1) + " = F" + name + "(r" + str(depth - 1) + ")")
+            elif opcode in BINARY_STACK:
+                depth -= 1
+                namespace["F" + name] = BINARY_STACK[opcode]
+                lines.append("    r" + str(depth - 1) + " = F" + name + "(r" + str(depth - 1) + ", r" + str(depth) + ")")
+            else:
+                depth -= 2
+                lines += ["    engine.executed += " + str(length - 1),
+                          "    if jump_condition(r" + str(depth) + ", r" + str(depth + 1) + ") == " + str(STACK_JUMPS[opcode]) + ":",
+                          "        return " + str(inst.arg1.slot + 1),
+                          "    return " + str(position + 1)]
+                break
+        else:
+            lines += ["    engine.executed += " + str(length - 1),
+                      "    return " + str(inst_order + length)]
+
+        exec(compile("\n".join(lines) + "\n", "<stack region " + str(program[inst_order].order) + ">", "exec"), namespace)
+        return namespace["handler"]
+
+    def compare_and_branch(self, operation, compare, target, equal, constant):
+        """ LT/GT/EQ tmp a b; JUMPIFEQ/JUMPIFNEQ label tmp bool@constant,
+        tmp is still assigned as it may be used after the jump """
+
+        engine = self.engine
+        symtable = self.symtable
+        arg_tmp, arg_a, arg_b = compare.arg1, compare.arg2, compare.arg3
+        expected = constant.value
+
+        def handler(inst, inst_order):
+            result = operation(symtable.get_value(arg_a), symtable.get_value(arg_b))
+            symtable.set_var(arg_tmp, result)
+            engine.executed += 1
+            if (result.value == expected) == equal:
+                return target + 1
+            return inst_order + 2
+        return handler
+
+    def new_frame(self):
+        """ CREATEFRAME; PUSHFRAME """
+
+        engine = self.engine
+        symtable = self.symtable
+
+        def handler(inst, inst_order):
+            symtable.create_frame()
+            symtable.push_frame()
+            engine.executed += 1
+            return inst_order + 2
+        return handler
+
+    def return_frame(self):
+        """ POPFRAME; RETURN """
+
+        engine = self.engine
+        symtable = self.symtable
+        labels = self.labels
+
+        def handler(inst, inst_order):
+            symtable.pop_frame()
+            engine.inst_order = inst_order + 1
+            engine.executed += 1
+            return labels.ret() + 1
+        return handler
@@ -0,0 +1,63 @@
+import sys
+
+# Flush policies of the output buffer
+EXIT = "exit"
+NEWLINE = "newline"
+READ = "read"
+POLICIES = (EXIT, NEWLINE, READ)
+
+# Default size of the output buffer in characters
+BUFFER_SIZE = 65536
+
+class Output:
+    stream = None
+    encoding = None
+    errors = None
+    size = 0
+    policy = None
+    line_buffered = False
+    parts = None
+    length = 0
+
+    def __init__(self, stream, encoding="utf-8", errors="strict", size=BUFFER_SIZE, policy=EXIT):
+        """ Buffered output of WRITE instructions to a binary stream, the buffered texts are joined and encoded
+        once per flush. The buffer is flushed when it holds size characters, at the end of the program, on errors
+        and before BREAK and DPRINT write to stderr. Policy NEWLINE flushes also after every written newline
+        and before READ, policy READ only before READ """
+
+        self.stream = stream
+        self.encoding = encoding
+        self.errors = errors
+        self.size = size
+        self.policy = policy
+        self.line_buffered = policy == NEWLINE
+        self.parts = []
+
+    def write(self, text):
+        """ Appends a text to the buffer """
+
+        self.parts.append(text)
+        self.length += len(text)
+        if self.length >= self.size or (self.line_buffered and "\n" in text):
+            self.flush()
+
+    def flush(self):
+        """ Writes the buffer to the stream """
+
+        if self.parts:
+            data = "".join(self.parts).encode(self.encoding, self.errors)
+            self.parts.clear()
+            self.length = 0
+            self.stream.write(data)
+        self.stream.flush()
+
+    def before_read(self):
+        """ Flushes the buffer before READ unless the policy is EXIT, so prompts are shown in interactive use """
+
+        if self.policy != EXIT:
+            self.flush()
+
+def standard_output(size=BUFFER_SIZE, policy=EXIT):
+    """ Returns Output writing to the binary layer of sys.stdout with its encoding """
+
+    return Output(sys.stdout.buffer, sys.stdout.encoding, sys.stdout.errors, size, policy)
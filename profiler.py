@@ -0,0 +1,129 @@
+import time
+from callgraph import CallGraph
+
+# Report formats and sort keys of --profile-format and --profile-sort
+FORMATS = ("text", "json")
+SORT_KEYS = ("time", "count", "order")
+# Weights of --profile-stacks
+WEIGHTS = ("count", "time")
+
+class Profiler:
+    counts = None
+    times = None
+    clock = None
+    graph = None
+    elapsed = 0
+
+    def __init__(self, program_length):
+        """ Execution counts and wall time in nanoseconds of every instruction and the call tree of labels (CallGraph),
+        filled by Engine.__run_profile__. Opcode statistics are sums of their instructions """
+
+        self.counts = [0] * program_length
+        self.times = [0] * program_length
+        self.clock = time.perf_counter_ns
+        self.graph = CallGraph()
+
+    def instructions(self, program):
+        """ Returns (order, opcode, count, time) of every executed instruction """
+
+        return [(inst.order, inst.opcode, self.counts[inst_order], self.times[inst_order])
+                for inst_order, inst in enumerate(program) if self.counts[inst_order] != 0]
+
+    def opcodes(self, program):
+        """ Returns (opcode, count, time) of every executed opcode """
+
+        totals = {}
+        for order, opcode, count, elapsed in self.instructions(program):
+            total = totals.setdefault(opcode, [0, 0])
+            total[0] += count
+            total[1] += elapsed
+        return [(opcode, count, elapsed) for opcode, (count, elapsed) in totals.items()]
+
+    def report(self, program, stream, format="text", sort="time", top=20):
+        """ Writes the tables of opcodes, top instructions, labels and caller/callee pairs sorted by time, count
+        or order (names for opcodes, labels and calls) """
+
+        instructions = self.instructions(program)
+        opcodes = self.opcodes(program)
+        labels = [(name,) + tuple(row) for name, row in self.graph.labels().items()]
+        calls = [caller_callee + tuple(row) for caller_callee, row in self.graph.edges().items()]
+        if sort == "time":
+            instructions.sort(key=lambda row: (-row[3], row[0]))
+            opcodes.sort(key=lambda row: (-row[2], row[0]))
+            labels.sort(key=lambda row: (-row[4], row[0]))
+            calls.sort(key=lambda row: (-row[4], row[:2]))
+        elif sort == "count":
+            instructions.sort(key=lambda row: (-row[2], row[0]))
+            opcodes.sort(key=lambda row: (-row[1], row[0]))
+            labels.sort(key=lambda row: (-row[2], row[0]))
+            calls.sort(key=lambda row: (-row[3], row[:2]))
+        else:
+            opcodes.sort()
+            labels.sort()
+            calls.sort()
+        if top > 0:
+            instructions = instructions[:top]
+
+        if format == "json":
+            self.__json__(program, stream, opcodes, instructions, labels, calls)
+        else:
+            self.__text__(program, stream, opcodes, instructions, labels, calls, sort)
+
+    def write_stacks(self, stream, weight="count"):
+        """ Writes the call tree as collapsed stacks for flamegraph.pl """
+
+        self.graph.write_collapsed(stream, weight)
+
+    def __text__(self, program, stream, opcodes, instructions, labels, calls, sort):
+        """ Writes the report as aligned tables, comment lines start with # """
+
+        executed = sum(self.counts)
+        total = sum(self.times)
+        stream.write("# {} instructions executed, {:.3f} ms in instructions, {:.3f} ms in the interpretation loop\n".format(
+            executed, total / 1e6, self.elapsed / 1e6))
+        stream.write("#\n# {:<12} {:>12} {:>12} {:>7} {:>9}\n".format("opcode", "count", "time ms", "time %", "ns/inst"))
+        for opcode, count, elapsed in opcodes:
+            stream.write("  {:<12} {:>12} {:>12.3f} {:>7.2f} {:>9.0f}\n".format(
+                opcode, count, elapsed / 1e6, percent(elapsed, total), elapsed / count))
+
+        stream.write("#\n# instructions by {}\n".format(sort))
+        stream.write("# {:>6} {:<12} {:>12} {:>12} {:>7} {:>9}  {}\n".format("order", "opcode", "count", "time ms", "time %", "ns/inst", "source"))
+        for order, opcode, count, elapsed in instructions:
+            stream.write("  {:>6} {:<12} {:>12} {:>12.3f} {:>7.2f} {:>9.0f}  {}\n".format(
+                order, opcode, count, elapsed / 1e6, percent(elapsed, total), elapsed / count, program[order - 1].source()))
+
+        stream.write("#\n# labels by {}, inclusive values of recursive labels count their outermost calls\n".format(sort))
+        stream.write("# {:<20} {:>10} {:>12} {:>12} {:>12} {:>12} {:>7}\n".format(
+            "label", "calls", "incl count", "excl count", "incl ms", "excl ms", "incl %"))
+        for name, calls_count, count, self_count, elapsed, self_time in labels:
+            stream.write("  {:<20} {:>10} {:>12} {:>12} {:>12.3f} {:>12.3f} {:>7.2f}\n".format(
+                name, calls_count, count, self_count, elapsed / 1e6, self_time / 1e6, percent(elapsed, total)))
+
+        stream.write("#\n# calls by {}\n".format(sort))
+        stream.write("# {:<20} {:<20} {:>10} {:>12} {:>12}\n".format("caller", "callee", "calls", "incl count", "incl ms"))
+        for caller, callee, calls_count, count, elapsed in calls:
+            stream.write("  {:<20} {:<20} {:>10} {:>12} {:>12.3f}\n".format(caller, callee, calls_count, count, elapsed / 1e6))
+
+    def __json__(self, program, stream, opcodes, instructions, labels, calls):
+        """ Writes the report as a JSON object, times are in nanoseconds """
+
+        import json
+        json.dump({
+            "executed": sum(self.counts),
+            "time_ns": sum(self.times),
+            "loop_time_ns": self.elapsed,
+            "opcodes": [{"opcode": opcode, "count": count, "time_ns": elapsed} for opcode, count, elapsed in opcodes],
+            "instructions": [{"order": order, "opcode": opcode, "count": count, "time_ns": elapsed, "source": program[order - 1].source()}
+                             for order, opcode, count, elapsed in instructions],
+            "labels": [{"label": name, "calls": calls_count, "inclusive_count": count, "exclusive_count": self_count,
+                        "inclusive_time_ns": elapsed, "exclusive_time_ns": self_time}
+                       for name, calls_count, count, self_count, elapsed, self_time in labels],
+            "calls": [{"caller": caller, "callee": callee, "calls": calls_count, "inclusive_count": count, "inclusive_time_ns": elapsed}
+                      for caller, callee, calls_count, count, elapsed in calls],
+        }, stream, indent=2)
+        stream.write("\n")
+
+def percent(part, total):
+    """ Returns part of total in percents """
+
+    return part * 100 / total if total != 0 else 0.0
@@ -0,0 +1,90 @@
+from error import *
+from symtable import SCOPES, GF
+import value
+
+class Program:
+    instructions = None
+    labels = None
+    global_names = None
+    local_names = None
+    constants = None
+
+    def __init__(self, instructions):
+        """ Decoded program, instructions are sorted by order """
+
+        self.instructions = instructions
+        self.labels = dict()
+        self.global_names = []
+        self.local_names = []
+        self.constants = []
+
+    def define_labels(self):
+        """ Defines labels (name -> index of LABEL instruction), redefinition of a label is a semantic error """
+
+        for inst_order in range (0, len(self.instructions)):
+            inst = self.instructions[inst_order]
+            if inst.opcode == "LABEL":
+                if inst.arg1.value in self.labels:
+                    err.exit_script(err.semantics, inst_order + 1)
+                self.labels[inst.arg1.value] = inst_order
+
+    def link_labels(self):
+        """ Rewrites label operands of jumps and calls to the index of their LABEL instruction (Arg.slot),
+        all undefined labels are reported at once as a semantic error """
+
+        undefined = []
+
+        for inst_order in range (0, len(self.instructions)):
+            inst = self.instructions[inst_order]
+            if inst.opcode in ("JUMP", "CALL", "JUMPIFEQ", "JUMPIFNEQ", "JUMPIFEQS", "JUMPIFNEQS"):
+                if inst.arg1.value in self.labels:
+                    inst.arg1.slot = self.labels[inst.arg1.value]
+                else:
+                    undefined.append(inst)
+
+        if len(undefined) != 0:
+            for inst in undefined:
+                sys.stderr.write("Undefined label " + inst.arg1.value + " at inst " + str(inst.order) + "\n")
+            err.exit_script(err.semantics, undefined[0].order)
+
+    def resolve_variables(self):
+        """ Assigns a slot index to every variable, GF variables have their own slots,
+        TF and LF variables share slots as a temporary frame becomes a local frame """
+
+        global_slots = dict()
+        local_slots = dict()
+
+        for inst in self.instructions:
+            for arg in (inst.arg1, inst.arg2, inst.arg3)[:inst.args]:
+                if arg.datatype != "var":
+                    continue
+                arg.scope = SCOPES[arg.frame]
+                if arg.scope == GF:
+                    slots, names = global_slots, self.global_names
+                else:
+                    slots, names = local_slots, self.local_names
+                if arg.value not in slots:
+                    slots[arg.value] = len(names)
+                    names.append(arg.value)
+                arg.slot = slots[arg.value]
+
+    def resolve_constants(self):
+        """ Builds the constant pool, every distinct literal is converted to a runtime value once
+        and all equal literals refer to the same value """
+
+        pool = dict()
+
+        for inst in self.instructions:
+            for arg in (inst.arg1, inst.arg2, inst.arg3)[:inst.args]:
+                if arg.datatype not in value.TYPES:
+                    continue
+                # Floats are compared by their exact representation (0.0 and -0.0 differ)
+                if arg.datatype == "float":
+                    key = (arg.datatype, arg.value.hex())
+                else:
+                    key = (arg.datatype, arg.value)
+                if key not in pool:
+                    pool[key] = len(self.constants)
+                    self.constants.append(value.from_arg(arg))
+                arg.slot = pool[key]
+                arg.const = self.constants[arg.slot]
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import socket
+import signal
+import argparse
+import threading
+import traceback
+# Modules of the interpreter are imported once by the server and shared by all forked children,
+# including the ones interpret.py imports only when they are used
+import interpret
+import inspect
+import tempfile
+import loader
+import closure
+import optimizer
+import jit
+import translator
+from error import *
+from client import socket_path, DEFAULT_SOCKET
+
+class Server:
+    path = None
+    listener = None
+
+    def __init__(self, path):
+        """ Interpreter server listening on a Unix socket, every request is run by a forked child of the server,
+        so the program starts with all modules already imported. A request is the working directory and arguments
+        of interpret.py with stdin, stdout and stderr of the client passed as file descriptors (see client.py),
+        the child writes to them directly and replies with the exit code """
+
+        self.path = path
+
+    def serve_forever(self):
+        """ Accepts requests until the server is interrupted """
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the owner can connect
+        umask = os.umask(0o077)
+        try:
+            self.listener.bind(self.path)
+        finally:
+            os.umask(umask)
+        self.listener.listen(64)
+        # Finished children are reaped by the kernel
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        # The socket is removed also when the server is terminated
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+        try:
+            while True:
+                connection = self.listener.accept()[0]
+                if os.fork() == 0:
+                    self.listener.close()
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    signal.signal(signal.SIGINT, signal.SIG_DFL)
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    exit_code = 1
+                    try:
+                        exit_code = self.__handle__(connection)
+                    except BaseException:
+                        traceback.print_exc()
+                    finally:
+                        os._exit(exit_code)
+                connection.close()
+        finally:
+            self.listener.close()
+            os.unlink(self.path)
+
+    def __handle__(self, connection):
+        """ Runs one request in the forked child, returns the exit code """
+
+        cwd, argv, fds = receive_request(connection)
+        if len(fds) != 3:
+            return 1
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", closefd=False)
+        sys.stderr = open(2, "w", buffering=1, errors="backslashreplace", closefd=False)
+        os.chdir(cwd)
+        sys.argv = ["interpret.py"] + argv
+
+        # The program is stopped when the client is gone
+        threading.Thread(target=self.__watch__, args=(connection,), daemon=True).start()
+
+        try:
+            exit_code = interpret.main()
+        except IppError as error:
+            sys.stderr.write(error.report())
+            exit_code = error.code
+        except SystemExit as error:
+            # argparse exits on invalid arguments and --help
+            exit_code = error.code if isinstance(error.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except OSError:
+            pass
+        connection.sendall(str(exit_code).encode() + b"\n")
+        return exit_code
+
+    def __watch__(self, connection):
+        """ Ends the child when the client closes the connection before the reply """
+
+        try:
+            connection.recv(1)
+        except OSError:
+            pass
+        os._exit(1)
+
+def receive_request(connection):
+    """ Returns (working directory, arguments, file descriptors) of a request, the message is its length
+    in 4 bytes and NUL separated working directory and arguments """
+
+    data, fds = socket.recv_fds(connection, 65536, 3)[:2]
+    while len(data) < 4 or len(data) < 4 + int.from_bytes(data[:4], "big"):
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    fields = data[4:].decode("utf-8", "surrogateescape").split("\0")
+    return fields[0], fields[1:], fds
+
+def main():
+    """ Command line interface of the server """
+
+    parser = argparse.ArgumentParser(description="runs interpret.py requests of client.py in forked children of one pre-imported process")
+    parser.add_argument("--socket", default=socket_path(), help="path of the Unix socket, $IPP_SOCKET or " + DEFAULT_SOCKET + " by default")
+    args = parser.parse_args()
+
+    try:
+        Server(args.socket).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
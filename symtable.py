@@ -1,46 +1,100 @@
 from error import *
+from value import TYPE_NAMES
+
+# Frame of a variable (Arg.scope), index to SymTable.frames
+GF = 0
+TF = 1
+LF = 2
+SCOPES = {"GF": GF, "TF": TF, "LF": LF}
+
+class Values(dict):
+    """ Values of a sparse frame by slot, a missing slot reads as None like an uninitialised variable """
+
+    __slots__ = ()
+
+    def __missing__(self, slot):
+        return None
+
+class Defined(dict):
+    """ Defined slots of a sparse frame, a missing slot reads as 0 (undefined) """
+
+    __slots__ = ()
+
+    def __missing__(self, slot):
+        return 0
+
+class Frame:
+    """ Frame of variables indexed by slots resolved when the program is loaded. GF is a fixed-size frame
+    with a slot for every GF variable, TF and LF frames are sparse and hold only the variables defined in
+    them, as their slots are numbered across the whole program. Both are read as values[slot] and defined[slot].
+    count is the amount of initialised variables, kept by SymTable only while it counts them for STATI --vars """
+
+    __slots__ = ("values", "defined", "count")
+
+    def __init__(self, size=None):
+        self.count = 0
+        if size == None:
+            self.values = Values()
+            self.defined = Defined()
+        else:
+            self.values = [None] * size
+            self.defined = bytearray(size)
+
+    def slots(self):
+        """ Returns slots of the defined variables in ascending order """
+
+        if isinstance(self.defined, Defined):
+            return sorted(self.defined)
+        return [slot for slot in range(0, len(self.defined)) if self.defined[slot]]
+
+    def initialised(self):
+        """ Returns amount of initialised variables """
+
+        if isinstance(self.values, Values):
+            return sum(1 for value in self.values.values() if value is not None)
+        return len(self.values) - self.values.count(None)
 
 class SymTable:
-    glob = dict()
+    glob = None
     temp = None
     temp_defined = False
-    local_stack = []
+    local_stack = None
     local_defined = False
-    var_stack = []
+    frames = None
+    var_stack = None
+    counting = False
+    defined_vars = 0
     max_defined_vars = 0
+    global_names = None
+    local_names = None
 
-    def __is_frame_defined__(self, arg):
-        """ Returns whether variable's frame is defined """
+    def __init__(self, global_names, local_names):
+        """ global_names and local_names map slot indices of GF and TF/LF variables to their names """
+
+        self.global_names = global_names
+        self.local_names = local_names
+        self.glob = Frame(len(global_names))
+        self.local_stack = []
+        self.var_stack = []
+        # Frames indexed by Arg.scope, undefined frame is None
+        self.frames = [self.glob, None, None]
+
+    def __frame__(self, arg):
+        """ Returns variable's frame """
+
+        frame = self.frames[arg.scope]
+        if frame is None:
+            err.exit_script(err.undef_frame)
+        return frame
 
-        if arg.frame == "GF":
-            return True
-        elif arg.frame == "TF" and self.temp_defined == True:
-            return True
-        elif arg.frame == "LF" and self.local_defined == True:
-            return True
-        else:
-            return False
-    
-    def __is_var_defined__(self, arg):
-        """ Returns whether a variable is defined """
-
-        if arg.frame == "GF" and arg.value in self.glob:
-            return True
-        elif arg.frame == "TF" and arg.value in self.temp:
-            return True
-        elif arg.frame == "LF" and arg.value in self.local_stack[-1]:
-            return True
-        else:
-            return False
-        
     def create_frame(self):
         """ Creates an empty temporary frame """
 
-        if self.temp_defined == False:
-            self.temp = dict()
-            self.temp_defined = True
-        else:
-            self.temp.clear()
+        if self.counting and self.temp_defined:
+            self.defined_vars -= self.temp.count
+        self.temp = Frame()
+        self.temp_defined = True
+        self.frames[TF] = self.temp
 
     def push_frame(self):
         """ Pushes a temporary frame to the local frame stack """
@@ -50,112 +104,103 @@ class SymTable:
         else:
             self.local_stack.append(self.temp)
             self.local_defined = True
+            self.frames[LF] = self.temp
             self.temp = None
             self.temp_defined = False
-    
+            self.frames[TF] = None
+
     def pop_frame(self):
         """ Pops a frame from the local frame stack """
 
         if len(self.local_stack) == 0:
             err.exit_script(err.undef_frame)
         else:
+            # The current temporary frame is discarded
+            if self.counting and self.temp_defined:
+                self.defined_vars -= self.temp.count
             self.temp = self.local_stack.pop()
             self.temp_defined = True
+            self.frames[TF] = self.temp
             if len(self.local_stack) == 0:
                 self.local_defined = False
+                self.frames[LF] = None
+            else:
+                self.frames[LF] = self.local_stack[-1]
 
     def defvar(self, arg):
         """ Defines a variable """
 
-        if self.__is_frame_defined__(arg) == False:
-            err.exit_script(err.undef_frame)
-        if self.__is_var_defined__(arg) == True:
-            err.exit_script(err.semantics)  # Undefined variable
-
-        if arg.frame == "GF":
-            self.glob[arg.value] = None
-        elif arg.frame == "TF":
-            self.temp[arg.value] = None
-        elif arg.frame == "LF":
-            self.local_stack[-1][arg.value] = None
-    
+        frame = self.__frame__(arg)
+        if frame.defined[arg.slot]:
+            err.exit_script(err.semantics)  # Redefined variable
+        frame.defined[arg.slot] = 1
+
     def set_var(self, arg1, arg2):
         """ Assigns a value to a variable """
 
-        if self.__is_frame_defined__(arg1) == False:
+        frame = self.frames[arg1.scope]
+        if frame is None:
             err.exit_script(err.undef_frame)
-        if self.__is_var_defined__(arg1) == False:
+        if not frame.defined[arg1.slot]:
             err.exit_script(err.undef_var)
-
-        if arg1.frame == "GF":
-            self.glob[arg1.value] = arg2
-        elif arg1.frame == "TF":
-            self.temp[arg1.value] = arg2
-        elif arg1.frame == "LF":
-            self.local_stack[-1][arg1.value] = arg2
-
+        if self.counting and frame.values[arg1.slot] is None:
+            frame.count += 1
+            self.__count__()
+        frame.values[arg1.slot] = arg2
 
     def get_var (self, arg):
         """ Gets a value from a variable """
 
-        if self.__is_frame_defined__(arg) == False:
+        frame = self.frames[arg.scope]
+        if frame is None:
             err.exit_script(err.undef_frame)
-        if self.__is_var_defined__(arg) == False:
-            err.exit_script(err.undef_var)
+        arg_get = frame.values[arg.slot]
 
-        if arg.frame == "GF":
-            arg_get = self.glob[arg.value]
-        elif arg.frame == "TF":
-            arg_get = self.temp[arg.value]
-        elif arg.frame == "LF":
-            arg_get = self.local_stack[-1][arg.value]
-        
-        if arg_get == None:
+        # Undefined and uninitialised variables both hold None
+        if arg_get is None:
+            if not frame.defined[arg.slot]:
+                err.exit_script(err.undef_var)
             err.exit_script(err.missing_value)
         return arg_get
 
     def get_var_even_uninitialised(self, arg):
-        """ Gets a value from a variable, doesn't check whether the variable is initialised """
+        """ Gets a value from a variable or a constant, doesn't check whether the variable is initialised """
 
-        if self.__is_frame_defined__(arg) == False:
-            err.exit_script(err.undef_frame)
-        if self.__is_var_defined__(arg) == False:
-            err.exit_script(err.undef_var)
+        if arg.scope is None:
+            return arg.const
 
-        if arg.frame == "GF":
-            arg_get = self.glob[arg.value]
-        elif arg.frame == "TF":
-            arg_get = self.temp[arg.value]
-        elif arg.frame == "LF":
-            arg_get = self.local_stack[-1][arg.value]
-        return arg_get
+        frame = self.__frame__(arg)
+        if not frame.defined[arg.slot]:
+            err.exit_script(err.undef_var)
+        return frame.values[arg.slot]
 
     def get_value(self, arg):
         """ Returns a constant or gets a value from a variable """
 
-        if arg.datatype == "var":
-            return self.get_var(arg)
-        else:
-            return arg
+        if arg.const is not None:
+            return arg.const
+        return self.get_var(arg)
+
+    def __print_frame__(self, frame, names, indent):
+        """ Prints defined variables of a frame """
+
+        for slot in frame.slots():
+            value = frame.values[slot]
+            if value == None:
+                sys.stderr.write(indent + "Var: " + names[slot] + ",\tUndefined value\n")
+            else:
+                sys.stderr.write(indent + "Var: " + names[slot] + ",\ttype: " + TYPE_NAMES[value.type] + ",\tvalue: " + value.text() + "\n")
 
     def print(self):
         """ Prints frame contents """
 
         sys.stderr.write("Frame contents:\n")
         sys.stderr.write("Global frame:\n")
-        for var in self.glob:
-            if self.glob[var] == None:
-                sys.stderr.write("\tVar: " + var + ",\tUndefined value\n")
-            else:
-                sys.stderr.write("\tVar: " + var + ",\ttype: " + self.glob[var].datatype + ",\tvalue: " + str(self.glob[var].value) + "\n")
+        self.__print_frame__(self.glob, self.global_names, "\t")
         sys.stderr.write("Temporary frame: defined: " + str(self.temp_defined) + "\n")
 
         if self.temp_defined:
-            for var in self.temp:
-                if self.temp[var] == None:
-                    sys.stderr.write("\tVar: " + var + ",\tUndefined value\n")
-                else:
-                    sys.stderr.write("\tVar: " + var + ",\ttype: " + self.temp[var].datatype + ",\tvalue: " + str(self.temp[var].value) + "\n")
+            self.__print_frame__(self.temp, self.local_names, "\t")
         sys.stderr.write("Local frame: defined: " + str(self.local_defined) + "\n")
 
         if self.local_defined:
@@ -163,12 +208,8 @@ class SymTable:
             for frame in self.local_stack:
                 sys.stderr.write("\tFrame " + str(frame_cntr) + ":\n")
                 frame_cntr += 1
-                for var in frame:
-                    if frame[var] == None:
-                        sys.stderr.write("\t\tVar: " + var + ",\tUndefined value\n")
-                    else:
-                        sys.stderr.write("\t\tVar: " + var + ",\ttype: " + frame[var].datatype + ",\tvalue: " + frame[var].value + "\n")
-        
+                self.__print_frame__(frame, self.local_names, "\t\t")
+
     def pushs(self, arg):
         """ Pushes a value to the value stack """
 
@@ -181,32 +222,27 @@ class SymTable:
             err.exit_script(err.missing_value)
         else:
             return self.var_stack.pop()
-    
+
     def clears(self):
         """ Clears the value stack """
 
         self.var_stack.clear()
-    
-    def count_vars(self):
-        """ Counts initialised variables in all frames and sets the maximum value """
-
-        counter = 0
 
-        for var, value in self.glob.items():
-            print(var,value)
-            if value != None:
-                counter += 1
-        
-        if self.temp_defined:
-            for var, value in self.temp.items():
-                if value != None:
-                    counter += 1
-
-        if self.local_defined:
-            for frame in self.local_stack:
-                for var, value in frame.items():
-                    if value != None:
-                        counter += 1
-
-        if counter > self.max_defined_vars:
-            self.max_defined_vars = counter
+    def count_vars(self):
+        """ Starts counting initialised variables for STATI --vars, the count is updated when a variable
+        gets its first value and when a temporary frame is discarded """
+
+        self.counting = True
+        self.defined_vars = 0
+        for frame in [self.glob, self.temp] + self.local_stack:
+            if frame is not None:
+                frame.count = frame.initialised()
+                self.defined_vars += frame.count
+        self.max_defined_vars = max(self.max_defined_vars, self.defined_vars)
+
+    def __count__(self):
+        """ Counts a newly initialised variable and sets the maximum value """
+
+        self.defined_vars += 1
+        if self.defined_vars > self.max_defined_vars:
+            self.max_defined_vars = self.defined_vars
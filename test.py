@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+import os
+import io
+import sys
+import json
+import glob
+import html
+import time
+import argparse
+import concurrent.futures
+
+# Interpreter of the worker process, created by init_worker
+interpreter = None
+
+def get_files(directory, recursive):
+    """ Returns a dictionary of directories and .src files to be tested, the same as get_files of test.php """
+
+    if not recursive:
+        return {directory: sorted(glob.glob(os.path.join(directory, "*.src")))}
+
+    files = {}
+    for path, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(".src"):
+                files.setdefault(path, []).append(os.path.join(path, filename))
+    return files
+
+def read_test_file(filename, ext):
+    """ Returns the contents of .in, .out or .rc file of a test, missing files are created (.rc contains 0) """
+
+    path = filename + ext
+    if not os.path.exists(path):
+        with open(path, "w") as test_file:
+            if ext == ".rc":
+                test_file.write("0")
+    with open(path, "rb") as test_file:
+        return test_file.read()
+
+def init_worker(int_script, options):
+    """ Imports the interpreter once per worker process """
+
+    global interpreter
+    sys.path.insert(0, os.path.dirname(os.path.abspath(int_script)))
+    from interpreter import Interpreter
+    interpreter = Interpreter(**options)
+
+def run_test(filename):
+    """ Runs one test in the worker process, returns (return code, output, wall time) """
+
+    from error import IppError
+    stdout = io.BytesIO()
+    start = time.perf_counter()
+    try:
+        exit_code = interpreter.run(filename + ".src", filename + ".in", stdout)[0]
+    except IppError as error:
+        exit_code = error.code
+    except Exception as error:
+        # An uncaught exception ends interpret.py with 1
+        sys.stderr.write("test.py: " + filename + ": " + repr(error) + "\n")
+        exit_code = 1
+    return exit_code, stdout.getvalue(), time.perf_counter() - start
+
+def expected_retval(rc):
+    """ Converts the contents of .rc file to a return code, the text itself is kept if it isn't a number """
+
+    try:
+        return int(rc)
+    except ValueError:
+        return rc.decode("utf-8", "replace")
+
+def generate_test_html(result):
+    """ Creates one HTML table row for one test, the same as generate_test_html of test.php """
+
+    testname = html.escape(result["name"])
+    if result["success"]:
+        return '<tr><td class="succ">OK</td><td>' + testname + '</td><td class="succ">OK</td><td class="succ">OK</td></tr>'
+
+    row = '<tr><td class="fail">FAIL</td><td>' + testname + '</td>'
+    if result["expected_rc"] == result["rc"]:
+        row += '<td class="succ">OK</td>'
+    else:
+        row += '<td class="fail">FAIL Expected: ' + html.escape(str(result["expected_rc"])) + ' Got: ' + str(result["rc"]) + '</td>'
+    if result["output_ok"]:
+        row += '<td class="succ">OK</td></tr>'
+    else:
+        row += ('<td class="fail">FAIL Expected: ' + html.escape(result["expected_output"]) + '<br>Got: '
+                + html.escape(result["output"]) + '</td></tr>')
+    return row
+
+def percent(passed, total):
+    """ Returns the success rate rounded as by test.php """
+
+    if total == 0:
+        return "0"
+    return str(round(passed / total * 100, 2))
+
+def generate_html(test_dirs, results):
+    """ Returns the HTML report of all tests grouped by directories """
+
+    html_dirs = ""
+    for directory, files in test_dirs.items():
+        dir_results = [results[filename] for filename in files]
+        passed = sum(1 for result in dir_results if result["success"])
+        html_dirs += ('<div class="dir"> Directory: <b>' + html.escape(directory) + '</b> Passed tests: ' + str(passed) + '/'
+                      + str(len(dir_results)) + ' (' + percent(passed, len(dir_results)) + ' %)\n    <table class="file"><tr>\n'
+                      + '    <th>Status</th>\n    <th>Test name</th>\n    <th>Return code</th>\n    <th>Output</th>\n    </tr>'
+                      + "".join(generate_test_html(result) for result in dir_results) + '</table></div>')
+
+    passed = sum(1 for result in results.values() if result["success"])
+    return (HTML_HEADER + '<h3>Total passed tests: ' + str(passed) + '/' + str(len(results)) + ' ('
+            + percent(passed, len(results)) + ' %)</h3>' + html_dirs + '</html>')
+
+HTML_HEADER = """<html>
+<head>
+    <title>test.py report</title>
+    <style>
+    body {
+        font-size: 16px;
+        font-family: Arial, Helvetica, sans-serif;
+    }
+    .dir {
+        background-color:rgb(238, 238, 238);
+        padding: 5px;
+        border-radius: 5px;
+        margin-top: 6px;
+        }
+    .file {
+        background-color: rgb(248, 248, 248);
+        padding: 3px;
+        margin-left: 5px;
+        margin-top: 2px;
+        border-radius: 5px;
+        text-align: center;
+    }
+    .succ{
+        color: seagreen;
+    }
+    .fail{
+        color:maroon;
+    }
+    table {
+        border-collapse: collapse;
+    }
+    table, th, td {
+        border: 1px solid rgb(129, 129, 129);
+        padding: 3px;
+    }
+    </style>
+</head>
+<body>"""
+
+def main():
+    """ Runs all tests in a pool of worker processes, prints the HTML report and writes the JSON report """
+
+    parser = argparse.ArgumentParser(description="runs interpret.py tests (.src, .in, .out, .rc) in parallel worker processes")
+    parser.add_argument("--directory", default=".", help="directory to search tests in")
+    parser.add_argument("--recursive", action="store_true", help="search tests in subdirectories of the test directory")
+    parser.add_argument("--int-script", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "interpret.py"), help="path to interpret.py, its directory is imported by the workers")
+    parser.add_argument("--int-only", action="store_true", help="accepted for compatibility with test.php, only interpret.py is tested")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="amount of worker processes, the amount of CPUs by default")
+    parser.add_argument("--json", dest="json_file", help="writes a JSON report with per-test timings to this file")
+    parser.add_argument("--engine", choices=("default", "closure"), default="default", help="execution engine of interpret.py")
+    parser.add_argument("--optimize", action="store_true", help="runs the tests with --optimize")
+    parser.add_argument("--jit", action="store_true", help="runs the tests with --jit")
+    parser.add_argument("--no-cache", action="store_true", help="neither reads nor writes compiled programs")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    test_dirs = get_files(args.directory, args.recursive)
+    tests = [os.path.splitext(filename)[0] for files in test_dirs.values() for filename in files]
+    options = {"engine": args.engine, "optimize": args.optimize, "jit": args.jit, "no_cache": args.no_cache}
+
+    # Reference files are read (and missing ones created) before the workers start
+    expected = {}
+    for filename in tests:
+        rc = read_test_file(filename, ".rc")
+        read_test_file(filename, ".in")
+        expected[filename] = (expected_retval(rc), read_test_file(filename, ".out"))
+
+    start = time.perf_counter()
+    results = {}
+    with concurrent.futures.ProcessPoolExecutor(args.jobs, initializer=init_worker, initargs=(args.int_script, options)) as executor:
+        futures = {executor.submit(run_test, filename): filename for filename in tests}
+        for future in concurrent.futures.as_completed(futures):
+            filename = futures[future]
+            retval, output, elapsed = future.result()
+            expected_rc, expected_output = expected[filename]
+            output_ok = retval != 0 or output == expected_output
+            results[filename + ".src"] = {
+                "name": os.path.basename(filename),
+                "path": filename + ".src",
+                "success": retval == expected_rc and output_ok,
+                "rc": retval,
+                "expected_rc": expected_rc,
+                "output_ok": output_ok,
+                "output": output.decode("utf-8", "replace"),
+                "expected_output": expected_output.decode("utf-8", "replace"),
+                "time": elapsed,
+            }
+            sys.stderr.write("test.py: finished test " + filename + "\n")
+    total_time = time.perf_counter() - start
+
+    print(generate_html(test_dirs, results))
+
+    if args.json_file != None:
+        report = {"total": len(results), "passed": sum(1 for result in results.values() if result["success"]),
+                  "jobs": args.jobs, "time": total_time, "tests": []}
+        for files in test_dirs.values():
+            for filename in files:
+                result = results[filename]
+                report["tests"].append({key: result[key] for key in ("name", "path", "success", "rc", "expected_rc", "output_ok", "time")})
+        with open(args.json_file, "w") as json_file:
+            json.dump(report, json_file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
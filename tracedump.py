@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+import sys
+import mmap
+import argparse
+import collections
+import tracer
+
+def dump(buffer, output, tail):
+    """ Prints a binary trace written by --trace-file as text, only the last tail entries if tail is set """
+
+    entries = tracer.decode(buffer)
+    if tail != None:
+        entries = collections.deque(entries, maxlen=tail)
+    output.write("# {:>8} {:>6} {:<12} {:<24} {}\n".format("step", "order", "opcode", "operand types", "pc"))
+    for entry in entries:
+        output.write(tracer.format_entry(*entry) + "\n")
+    return 0
+
+
+parser = argparse.ArgumentParser(description="prints a binary trace of interpret.py --trace-file as text")
+parser.add_argument("file", help="binary trace")
+parser.add_argument("--tail", type=int, help="prints only the last TAIL executed instructions")
+args = parser.parse_args()
+
+try:
+    with open(args.file, "rb") as trace_file:
+        with mmap.mmap(trace_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            sys.exit(dump(buffer, sys.stdout, args.tail))
+except (OSError, ValueError) as error:
+    sys.stderr.write(str(error) + "\n")
+    sys.exit(1)
@@ -0,0 +1,160 @@
+import sys
+import struct
+from value import TYPE_NAMES
+
+# Operand type codes of trace entries, runtime value types (value.py) are followed by the codes of
+# variables without a value (undefined frame or variable, uninitialised variable), labels and types
+UNSET = len(TYPE_NAMES)
+LABEL = UNSET + 1
+TYPE = UNSET + 2
+NONE = 255
+OPERAND_TYPE_NAMES = TYPE_NAMES + ("unset", "label", "type")
+
+# Binary trace file: header, opcode names (length and ASCII name), then one record per executed instruction
+MAGIC = b"IPPT"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+# Record: pc (index of the instruction), order, opcode index and three operand type codes
+RECORD = struct.Struct("<IIB3s")
+# Records are written to the file in blocks of about this size
+BLOCK_SIZE = 1 << 16
+
+class Tracer:
+    program = None
+    size = 0
+    ring = None
+    position = 0
+    stream = None
+    block = None
+    opcodes = None
+    templates = None
+    variables = None
+    prefixes = None
+
+    def __init__(self, program, size, stream=None):
+        """ Records (pc, operand types) of every executed instruction to a ring buffer of size entries,
+        filled by Engine.__run_trace__. With a binary stream all entries are written to it as RECORD """
+
+        self.program = program
+        self.size = size
+        # The ring has one entry at least, so that recording needs no check of its size
+        self.ring = [None] * max(size, 1)
+        self.stream = stream
+        self.block = bytearray()
+        self.opcodes = sorted(set(inst.opcode for inst in program))
+        opcode_index = {opcode: index for index, opcode in enumerate(self.opcodes)}
+
+        # Operand types known before the run are in the template of the instruction,
+        # variables are looked up as (index of the operand, scope, slot) when the instruction is recorded
+        self.templates = []
+        self.variables = []
+        self.prefixes = []
+        for inst_order, inst in enumerate(program):
+            template = bytearray(b"\xff\xff\xff")
+            variables = []
+            for index, arg in enumerate((inst.arg1, inst.arg2, inst.arg3)[:inst.args]):
+                if arg.const is not None:
+                    template[index] = arg.const.type
+                elif arg.scope is not None:
+                    variables.append((index, arg.scope, arg.slot))
+                elif arg.datatype == "label":
+                    template[index] = LABEL
+                else:
+                    template[index] = TYPE
+            self.templates.append(bytes(template))
+            self.variables.append(tuple(variables))
+            self.prefixes.append(RECORD.pack(inst_order, inst.order, opcode_index[inst.opcode], b"")[:-3])
+
+        if stream != None:
+            stream.write(HEADER.pack(MAGIC, VERSION, len(self.opcodes)))
+            for opcode in self.opcodes:
+                stream.write(bytes((len(opcode),)) + opcode.encode("ascii"))
+
+    def record(self, pc, frames):
+        """ Records the instruction at index pc before it is executed, frames are SymTable.frames """
+
+        types = self.templates[pc]
+        variables = self.variables[pc]
+        if variables:
+            types = bytearray(types)
+            for index, scope, slot in variables:
+                frame = frames[scope]
+                value = None if frame is None else frame.values[slot]
+                types[index] = UNSET if value is None else value.type
+            types = bytes(types)
+
+        ring = self.ring
+        ring[self.position % len(ring)] = (pc, types)
+        self.position += 1
+        if self.stream != None:
+            block = self.block
+            block += self.prefixes[pc]
+            block += types
+            if len(block) >= BLOCK_SIZE:
+                self.flush()
+
+    def flush(self):
+        """ Writes the recorded block to the binary stream """
+
+        if self.stream != None:
+            self.stream.write(self.block)
+            self.block.clear()
+
+    def entries(self):
+        """ Returns (step, pc, order, opcode, operand types) of the entries in the ring buffer, oldest first """
+
+        first = max(0, self.position - self.size)
+        entries = []
+        for step in range(first, self.position):
+            pc, types = self.ring[step % self.size]
+            inst = self.program[pc]
+            entries.append((step + 1, pc, inst.order, inst.opcode, types))
+        return entries
+
+    def dump(self, stream=None, output=None):
+        """ Writes the entries of the ring buffer as text, called when the program ends by an error. The buffered
+        output of the program is flushed first, so that the trace follows it """
+
+        if output != None:
+            output.flush()
+        if stream == None:
+            stream = sys.stderr
+        entries = self.entries()
+        stream.write("Trace of the last " + str(len(entries)) + " of " + str(self.position) + " executed instructions:\n")
+        for entry in entries:
+            stream.write(format_entry(*entry) + "\n")
+
+def format_entry(step, pc, order, opcode, types):
+    """ Returns one trace entry as a line of text """
+
+    names = [OPERAND_TYPE_NAMES[code] for code in types if code != NONE]
+    return "{:>10} {:>6} {:<12} {:<24} pc={}".format(step, order, opcode, " ".join(names), pc)
+
+def decode(buffer):
+    """ Returns an iterator of (step, pc, order, opcode, operand types) of a binary trace,
+    raises ValueError if it is not a trace """
+
+    if len(buffer) < HEADER.size:
+        raise ValueError("Not an IPPcode19 trace")
+    magic, version, opcode_count = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an IPPcode19 trace")
+    if version != VERSION:
+        raise ValueError("Unsupported trace version " + str(version) + ", expected " + str(VERSION))
+
+    offset = HEADER.size
+    opcodes = []
+    for i in range(0, opcode_count):
+        length = buffer[offset]
+        opcodes.append(bytes(buffer[offset + 1:offset + 1 + length]).decode("ascii"))
+        offset += 1 + length
+
+    return records(buffer, offset, opcodes)
+
+def records(buffer, offset, opcodes):
+    """ Yields the decoded records of a binary trace starting at offset """
+
+    # A trace of an interrupted run may end with a partial record
+    for step in range(0, (len(buffer) - offset) // RECORD.size):
+        pc, order, opcode, types = RECORD.unpack_from(buffer, offset + step * RECORD.size)
+        yield step + 1, pc, order, opcodes[opcode], types
@@ -0,0 +1,458 @@
+import os
+import sys
+import bisect
+import value
+from error import *
+from arg import Arg
+from symtable import SymTable, GF
+from input import standard_input
+from output import standard_output
+
+# Operations called by translated programs, opcode -> function of operations module
+UNARY = {"INT2CHAR": "int2char", "STRLEN": "strlen", "FLOAT2INT": "float2int", "INT2FLOAT": "int2float", "NOT": "not_"}
+BINARY = {"ADD": "add", "SUB": "sub", "MUL": "mul", "IDIV": "idiv", "DIV": "div", "LT": "lt", "GT": "gt", "EQ": "eq",
+          "AND": "and_", "OR": "or_", "STRI2INT": "stri2int", "CONCAT": "concat", "GETCHAR": "getchar"}
+UNARY_STACK = {"INT2CHARS": "int2char", "FLOAT2INTS": "float2int", "INT2FLOATS": "int2float", "NOTS": "not_"}
+BINARY_STACK = {"ADDS": "add", "SUBS": "sub", "MULS": "mul", "IDIVS": "idiv", "DIVS": "div", "LTS": "lt", "GTS": "gt",
+                "EQS": "eq", "ANDS": "and_", "ORS": "or_", "STRI2INTS": "stri2int"}
+
+# Instructions ending a basic block
+TERMINATORS = ("JUMP", "JUMPIFEQ", "JUMPIFNEQ", "JUMPIFEQS", "JUMPIFNEQS", "CALL", "RETURN", "EXIT")
+
+# Names imported by translated programs
+RUNTIME = ("missing", "undefined_variable", "redefined", "missing_value", "operand_type", "operand_value",
+           "read_value", "sync_globals", "brk", "temp_vars", "set_counted", "variable", "main")
+OPERATIONS = ("add", "sub", "mul", "idiv", "div", "lt", "gt", "eq", "and_", "or_", "not_", "int2char", "stri2int",
+              "float2int", "int2float", "strlen", "concat", "getchar", "setchar", "type_of", "jump_condition")
+
+### Runtime support of translated programs ###
+# GF variables are locals of the translated program: False is an undefined variable, None an uninitialised one
+
+def missing(variable):
+    """ Reports reading of an undefined or uninitialised GF variable """
+
+    if variable is False:
+        err.exit_script(err.undef_var)
+    err.exit_script(err.missing_value)
+
+def undefined_variable():
+    err.exit_script(err.undef_var)
+
+def redefined():
+    err.exit_script(err.semantics)
+
+def missing_value():
+    err.exit_script(err.missing_value)
+
+def operand_type():
+    err.exit_script(err.operand_type)
+
+def operand_value():
+    err.exit_script(err.operand_value)
+
+def read_value(input, output, datatype):
+    """ READ """
+
+    output.before_read()
+    return input.read(datatype)
+
+def sync_globals(symtable, values):
+    """ Copies GF locals of a translated program to the symbol table (used by BREAK) """
+
+    for slot in range(0, len(values)):
+        symtable.glob.defined[slot] = values[slot] is not False
+        symtable.glob.values[slot] = values[slot] if values[slot] is not False else None
+
+def brk(symtable, output, order, executed):
+    """ BREAK """
+
+    output.flush()
+    sys.stderr.write("Instructions order: " + str(order) + "\n")
+    sys.stderr.write("Instructions executed: " + str(executed) + "\n")
+    symtable.print()
+
+def temp_vars(symtable):
+    """ Returns amount of initialised variables of the temporary frame, used by STATI --vars """
+
+    if not symtable.temp_defined:
+        return 0
+    return symtable.temp.initialised()
+
+def set_counted(symtable, variable, result):
+    """ Assigns a value to a TF/LF variable, returns 1 if the variable was uninitialised (STATI --vars) """
+
+    frame = symtable.frames[variable.scope]
+    initialised = frame is not None and frame.defined[variable.slot] and frame.values[variable.slot] is None
+    symtable.set_var(variable, result)
+    return 1 if initialised else 0
+
+def variable(scope, slot):
+    """ Creates a TF/LF variable operand used by translated programs """
+
+    arg = Arg(None)
+    arg.datatype = "var"
+    arg.scope = scope
+    arg.slot = slot
+    return arg
+
+def locate(error, filename, starts, orders):
+    """ Locates an error of a translated program, the instruction is found by the line which raised it """
+
+    line = None
+    traceback = error.__traceback__
+    while traceback != None:
+        if traceback.tb_frame.f_code.co_filename == filename:
+            line = traceback.tb_lineno
+        traceback = traceback.tb_next
+    if line != None:
+        error.locate(orders[bisect.bisect_right(starts, line) - 1])
+
+def load(source, path):
+    """ Compiles a translated program, returns its namespace """
+
+    namespace = {"__name__": "ippcode19", "__file__": path}
+    exec(compile(source, path, "exec"), namespace)
+    return namespace
+
+def execute(namespace, input=None, output=None):
+    """ Runs a translated program reading input (stdin if not set) and writing to output (buffered stdout if not set),
+    returns (exit code, executed instructions, maximum of initialised variables), errors raise IppError """
+
+    if input == None:
+        input = standard_input()
+    if output == None:
+        output = standard_output()
+
+    run = namespace["run"]
+    try:
+        return run(SymTable(namespace["GLOBAL_NAMES"], namespace["LOCAL_NAMES"]), input, output)
+    except IppError as error:
+        locate(error, run.__code__.co_filename, namespace["STARTS"], namespace["ORDERS"])
+        raise
+    finally:
+        # Output of the program precedes the error message
+        output.flush()
+
+def main(namespace):
+    """ Runs a translated program as a script, returns its exit code """
+
+    try:
+        return execute(namespace)[0]
+    except IppError as error:
+        sys.stderr.write(error.report())
+        return error.code
+
+class Translator:
+    program = None
+    count_vars = False
+    starts = None
+    orders = None
+    blocks = None
+    block_of = None
+    variables = None
+    global_count = 0
+    defined = None
+    entry_defined = None
+
+    def __init__(self, program, count_vars):
+        """ Translates a decoded Program into a Python module, basic blocks become straight-line code
+        dispatched by block index, GF variables become locals, TF/LF variables use the symbol table.
+        count_vars adds counting of initialised variables for STATI --vars """
+
+        self.program = program
+        self.count_vars = count_vars
+        self.starts = []
+        self.orders = []
+        self.variables = dict()
+        self.global_count = len(program.global_names)
+        self.defined = set()
+        self.entry_defined = set()
+
+    def translate(self):
+        """ Returns source of the Python module """
+
+        self.__split_blocks__()
+        tree = []
+        self.__tree__(0, len(self.blocks), tree, "        ")
+
+        header = [
+            "# IPPcode19 program translated by interpret.py --emit-python",
+            "import sys",
+            "sys.path.insert(0, " + repr(os.path.dirname(os.path.abspath(__file__))) + ")",
+            "from translator import " + ", ".join(RUNTIME),
+            "from operations import " + ", ".join(OPERATIONS),
+            "from value import constant, INT",
+            "",
+            "GLOBAL_NAMES = " + repr(tuple(self.program.global_names)),
+            "LOCAL_NAMES = " + repr(tuple(self.program.local_names)),
+            "CONSTANTS = (" + "".join(self.__constant__(const) + ", " for const in self.program.constants) + ")",
+            "VARIABLES = (" + "".join("variable(" + str(scope) + ", " + str(slot) + "), " for scope, slot in self.variables) + ")",
+            "",
+            "def run(symtable, input, output):",
+        ]
+        prologue = [
+            "stack = symtable.var_stack",
+            "push = stack.append",
+            "pop = stack.pop",
+            "get_var = symtable.get_var",
+            "set_var = symtable.set_var",
+            "write = output.write",
+            "call_stack = []",
+            "executed = 0",
+            "vars_count = 0",
+            "max_vars = 0",
+        ]
+        if self.global_count != 0:
+            prologue.append(" = ".join(self.__global__(slot) for slot in range(0, self.global_count)) + " = False")
+        if len(self.program.constants) != 0:
+            prologue.append("".join("k" + str(index) + ", " for index in range(0, len(self.program.constants))) + "= CONSTANTS")
+        if len(self.variables) != 0:
+            prologue.append("".join("v" + str(index) + ", " for index in range(0, len(self.variables))) + "= VARIABLES")
+        prologue += ["block = 0", "while True:"]
+
+        # Instruction lines were recorded as indices to the tree, line numbers start at 1
+        offset = len(header) + len(prologue) + 1
+        starts = [line + offset for line in self.starts]
+
+        lines = header + ["    " + line for line in prologue] + tree + [
+            "",
+            "STARTS = " + repr(tuple(starts)),
+            "ORDERS = " + repr(tuple(self.orders)),
+            "",
+            "if __name__ == \"__main__\":",
+            "    sys.exit(main(globals()))",
+            "",
+        ]
+        return "\n".join(lines)
+
+    def __split_blocks__(self):
+        """ Finds starts of basic blocks: the first instruction, instructions following a label
+        (jumps continue after the LABEL instruction) and instructions following a terminator """
+
+        instructions = self.program.instructions
+        starts = set()
+        if len(instructions) != 0:
+            starts.add(0)
+        for inst_order in range(0, len(instructions) - 1):
+            if instructions[inst_order].opcode == "LABEL" or instructions[inst_order].opcode in TERMINATORS:
+                starts.add(inst_order + 1)
+
+        self.blocks = sorted(starts)
+        self.block_of = dict()
+        for block in range(0, len(self.blocks)):
+            self.block_of[self.blocks[block]] = block
+
+    def __constant__(self, const):
+        """ Returns expression creating a constant """
+
+        if const.type == value.FLOAT:
+            return "constant(" + str(const.type) + ", float.fromhex(" + repr(const.value.hex()) + "))"
+        return "constant(" + str(const.type) + ", " + repr(const.value) + ")"
+
+    def __tree__(self, first, last, lines, indent):
+        """ Generates a binary search over block indices first..last (last is the end of the program) """
+
+        if first == last:
+            if first == len(self.blocks):
+                lines.append(indent + "return 0, executed, max_vars")
+            else:
+                self.__block__(first, lines, indent)
+            return
+
+        middle = (first + last + 1) // 2
+        lines.append(indent + "if block < " + str(middle) + ":")
+        self.__tree__(first, middle - 1, lines, indent + "    ")
+        lines.append(indent + "else:")
+        self.__tree__(middle, last, lines, indent + "    ")
+
+    def __block__(self, block, lines, indent):
+        """ Generates straight-line code of a basic block, blocks are generated in ascending order """
+
+        instructions = self.program.instructions
+        first = self.blocks[block]
+        last = self.blocks[block + 1] if block + 1 < len(self.blocks) else len(instructions)
+        counted = last - first
+        if instructions[last - 1].opcode == "EXIT":
+            # EXIT is not counted as an executed instruction
+            counted -= 1
+
+        # GF variables defined in the first block are defined in all other blocks,
+        # other defined variables are known only within the block
+        self.defined = set(self.entry_defined)
+
+        lines.append(indent + "executed += " + str(counted))
+        for inst_order in range(first, last):
+            inst = instructions[inst_order]
+            self.starts.append(len(lines))
+            self.orders.append(inst.order)
+            code = self.__instruction__(inst, block, counted - (inst_order - first) - 1)
+            lines += [indent + line for line in code]
+
+        if instructions[last - 1].opcode not in TERMINATORS:
+            lines.append(indent + "block = " + str(block + 1))
+
+        if block == 0:
+            self.entry_defined = self.defined
+
+    ### Operands ###
+    def __global__(self, slot):
+        return "g" + str(slot)
+
+    def __variable__(self, arg):
+        """ Returns name of a TF/LF variable operand """
+
+        key = (arg.scope, arg.slot)
+        if key not in self.variables:
+            self.variables[key] = len(self.variables)
+        return "v" + str(self.variables[key])
+
+    def __value__(self, arg):
+        """ Returns expression reading a constant or a variable """
+
+        if arg.scope == None:
+            return "k" + str(arg.slot)
+        if arg.scope == GF:
+            name = self.__global__(arg.slot)
+            return "(" + name + " or missing(" + name + "))"
+        return "get_var(" + self.__variable__(arg) + ")"
+
+    def __assign__(self, arg, expression):
+        """ Returns lines assigning an expression to a variable """
+
+        if arg.scope != GF:
+            if self.count_vars:
+                return ["vars_count += set_counted(symtable, " + self.__variable__(arg) + ", " + expression + ")",
+                        "if vars_count > max_vars:",
+                        "    max_vars = vars_count"]
+            return ["set_var(" + self.__variable__(arg) + ", " + expression + ")"]
+
+        name = self.__global__(arg.slot)
+        if not self.count_vars and arg.slot in self.defined:
+            return [name + " = " + expression]
+
+        # Operands are evaluated before the destination variable is checked
+        lines = ["result = " + expression]
+        if self.count_vars:
+            lines += ["if " + name + " is None:",
+                      "    vars_count += 1",
+                      "    if vars_count > max_vars:",
+                      "        max_vars = vars_count",
+                      "elif " + name + " is False:",
+                      "    undefined_variable()"]
+        else:
+            lines += ["if " + name + " is False:",
+                      "    undefined_variable()"]
+        lines.append(name + " = result")
+        return lines
+
+    ### Instructions ###
+    def __instruction__(self, inst, block, following):
+        """ Returns lines of an instruction, following is the amount of counted instructions after it in the block """
+
+        opcode = inst.opcode
+        arg1, arg2, arg3 = inst.arg1, inst.arg2, inst.arg3
+
+        if opcode in BINARY:
+            return self.__assign__(arg1, BINARY[opcode] + "(" + self.__value__(arg2) + ", " + self.__value__(arg3) + ")")
+        elif opcode in UNARY:
+            return self.__assign__(arg1, UNARY[opcode] + "(" + self.__value__(arg2) + ")")
+        elif opcode in BINARY_STACK:
+            return ["if len(stack) < 2:",
+                    "    missing_value()",
+                    "operand2 = pop()",
+                    "push(" + BINARY_STACK[opcode] + "(pop(), operand2))"]
+        elif opcode in UNARY_STACK:
+            return ["if not stack:",
+                    "    missing_value()",
+                    "push(" + UNARY_STACK[opcode] + "(pop()))"]
+
+        elif opcode == "MOVE":
+            return self.__assign__(arg1, self.__value__(arg2))
+        elif opcode == "DEFVAR":
+            if arg1.scope != GF:
+                return ["symtable.defvar(" + self.__variable__(arg1) + ")"]
+            self.defined.add(arg1.slot)
+            name = self.__global__(arg1.slot)
+            return ["if " + name + " is not False:",
+                    "    redefined()",
+                    name + " = None"]
+        elif opcode == "TYPE":
+            if arg2.scope == None:
+                source = self.__value__(arg2)
+            elif arg2.scope == GF:
+                name = self.__global__(arg2.slot)
+                source = "(" + name + " if " + name + " is not False else undefined_variable())"
+            else:
+                source = "symtable.get_var_even_uninitialised(" + self.__variable__(arg2) + ")"
+            return self.__assign__(arg1, "type_of(" + source + ")")
+        elif opcode == "SETCHAR":
+            return ["operand1 = " + self.__value__(arg2),
+                    "operand2 = " + self.__value__(arg3)] + \
+                self.__assign__(arg1, "setchar(" + self.__value__(arg1) + ", operand1, operand2)")
+        elif opcode == "READ":
+            return self.__assign__(arg1, "read_value(input, output, " + repr(arg2.value) + ")")
+        elif opcode == "WRITE":
+            return ["write(" + self.__value__(arg1) + ".text())"]
+        elif opcode == "DPRINT":
+            return ["output.flush()",
+                    "sys.stderr.write(" + self.__value__(arg1) + ".text())"]
+
+        elif opcode == "PUSHS":
+            return ["push(" + self.__value__(arg1) + ")"]
+        elif opcode == "POPS":
+            return ["if not stack:",
+                    "    missing_value()"] + self.__assign__(arg1, "pop()")
+        elif opcode == "CLEARS":
+            return ["stack.clear()"]
+
+        elif opcode == "CREATEFRAME" or opcode == "POPFRAME":
+            # The current temporary frame is discarded
+            lines = ["vars_count -= temp_vars(symtable)"] if self.count_vars else []
+            return lines + ["symtable." + ("create_frame" if opcode == "CREATEFRAME" else "pop_frame") + "()"]
+        elif opcode == "PUSHFRAME":
+            return ["symtable.push_frame()"]
+        elif opcode == "LABEL":
+            return []
+        elif opcode == "BREAK":
+            values = "".join(self.__global__(slot) + ", " for slot in range(0, self.global_count))
+            return ["sync_globals(symtable, (" + values + "))",
+                    "brk(symtable, output, " + str(inst.order) + ", executed - " + str(following) + ")"]
+
+        ### Terminators ###
+        next_block = str(block + 1)
+        if opcode == "JUMP":
+            return ["block = " + self.__target__(arg1)]
+        elif opcode == "JUMPIFEQ" or opcode == "JUMPIFNEQ":
+            condition = "jump_condition(" + self.__value__(arg2) + ", " + self.__value__(arg3) + ")"
+            return ["if " + ("" if opcode == "JUMPIFEQ" else "not ") + condition + ":",
+                    "    block = " + self.__target__(arg1),
+                    "else:",
+                    "    block = " + next_block]
+        elif opcode == "JUMPIFEQS" or opcode == "JUMPIFNEQS":
+            return ["if len(stack) < 2:",
+                    "    missing_value()",
+                    "operand2 = pop()",
+                    "if " + ("" if opcode == "JUMPIFEQS" else "not ") + "jump_condition(pop(), operand2):",
+                    "    block = " + self.__target__(arg1),
+                    "else:",
+                    "    block = " + next_block]
+        elif opcode == "CALL":
+            return ["call_stack.append(" + next_block + ")",
+                    "block = " + self.__target__(arg1)]
+        elif opcode == "RETURN":
+            return ["if not call_stack:",
+                    "    missing_value()",
+                    "block = call_stack.pop()"]
+        else:
+            # EXIT
+            return ["exit_value = " + self.__value__(arg1),
+                    "if exit_value.type != INT:",
+                    "    operand_type()",
+                    "if not 0 <= exit_value.value <= 49:",
+                    "    operand_value()",
+                    "return exit_value.value, executed, max_vars"]
+
+    def __target__(self, arg):
+        """ Returns index of the block following the LABEL instruction of a linked label operand """
+
+        return str(self.block_of.get(arg.slot + 1, len(self.blocks)))
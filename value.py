@@ -0,0 +1,176 @@
+# Type tags of runtime values
+INT = 0
+BOOL = 1
+STRING = 2
+FLOAT = 3
+NIL = 4
+TYPE_NAMES = ("int", "bool", "string", "float", "nil")
+TYPES = {"int": INT, "bool": BOOL, "string": STRING, "float": FLOAT, "nil": NIL}
+
+# Strings created by CONCAT and SETCHAR at least this long are kept in a StringBuffer
+BUFFER_LENGTH = 256
+
+class Value:
+    """ Runtime value of a variable or a data stack item, bool values are stored as Python bool,
+    values are never modified after they are created so they can be shared """
+
+    __slots__ = ("type", "value")
+
+    def __init__(self, type, value):
+        self.type = type
+        self.value = value
+
+    def text(self):
+        """ Returns textual representation of the value used by WRITE """
+
+        if self.type == STRING:
+            return self.value
+        elif self.type == INT:
+            return str(self.value)
+        elif self.type == BOOL:
+            return "true" if self.value else "false"
+        elif self.type == FLOAT:
+            return self.value.hex()
+        else:
+            return ""
+
+    def write(self, std):
+        """ Writes its own value to a specified output stream """
+
+        std.write(self.text())
+
+    def length(self):
+        """ Returns length of a string value """
+
+        return len(self.value)
+
+    def char(self, index):
+        """ Returns a character of a string value """
+
+        return self.value[index]
+
+    def concat(self, other):
+        """ Returns a new string value of both strings, long results are StringBuffer """
+
+        if len(self.value) + other.length() >= BUFFER_LENGTH:
+            chars = list(self.value)
+            chars.extend(other.value)
+            return StringBuffer(chars)
+        return Value(STRING, self.value + other.value)
+
+    def setchar(self, index, char):
+        """ Returns a new string value with a replaced character, long results are StringBuffer """
+
+        if len(self.value) >= BUFFER_LENGTH:
+            chars = list(self.value)
+            chars[index] = char
+            return StringBuffer(chars)
+        return Value(STRING, self.value[:index] + char + self.value[index + 1:])
+
+class StringBuffer(Value):
+    """ String value in a list of characters, CONCAT appends to it and SETCHAR replaces a character in place.
+    Only the newest version of a string owns the list, a version it was made from keeps the change as a diff
+    against the newer version (a persistent array), so all values still behave as immutable and MOVE
+    can share them. The string is joined into str when its value is read and the result is cached """
+
+    __slots__ = ("chars", "size", "cache", "base", "diff_index", "diff_char")
+
+    def __init__(self, chars):
+        # value is a property, Value.__init__ is not used
+        self.type = STRING
+        self.chars = chars
+        self.size = len(chars)
+        self.cache = None
+        self.base = None
+        self.diff_index = -1
+        self.diff_char = None
+
+    @property
+    def value(self):
+        """ The string as str """
+
+        if self.cache == None:
+            if self.chars is not None:
+                self.cache = "".join(self.chars)
+            else:
+                self.cache = self.__materialize__()
+        return self.cache
+
+    def __materialize__(self):
+        """ Returns the string of an old version, its diffs are applied to a copy of the newest version """
+
+        versions = []
+        version = self
+        while version.base is not None:
+            versions.append(version)
+            version = version.base
+        chars = list(version.cache) if version.chars is None else version.chars[:]
+        for version in reversed(versions):
+            if version.diff_index < 0:
+                del chars[version.size:]
+            else:
+                chars[version.diff_index] = version.diff_char
+        # The string is cached, the old version no longer needs the newer ones
+        self.base = None
+        return "".join(chars)
+
+    def __hand_over__(self, newer, diff_index, diff_char):
+        """ Gives the list to a newer version, this version keeps the diff against it unless its string is cached """
+
+        self.chars = None
+        if self.cache == None:
+            self.base = newer
+            self.diff_index = diff_index
+            self.diff_char = diff_char
+
+    def length(self):
+        return self.size
+
+    def char(self, index):
+        if self.chars is not None:
+            return self.chars[index]
+        return self.value[index]
+
+    def concat(self, other):
+        if self.chars is None:
+            # Copy on write of an old version
+            chars = list(self.value)
+            chars.extend(other.value)
+            return StringBuffer(chars)
+        chars = self.chars
+        chars.extend(other.value)
+        newer = StringBuffer(chars)
+        self.__hand_over__(newer, -1, None)
+        return newer
+
+    def setchar(self, index, char):
+        if self.chars is None:
+            chars = list(self.value)
+            chars[index] = char
+            return StringBuffer(chars)
+        chars = self.chars
+        old_char = chars[index]
+        chars[index] = char
+        newer = StringBuffer(chars)
+        self.__hand_over__(newer, index, old_char)
+        return newer
+
+TRUE = Value(BOOL, True)
+FALSE = Value(BOOL, False)
+NIL_VALUE = Value(NIL, None)
+
+def constant(type, value):
+    """ Creates a value of a constant, bool and nil values are shared """
+
+    if type == BOOL:
+        return TRUE if value else FALSE
+    elif type == NIL:
+        return NIL_VALUE
+    return Value(type, value)
+
+def from_arg(arg):
+    """ Creates a value of a constant operand """
+
+    if arg.datatype == "bool":
+        return constant(BOOL, arg.value == "true")
+    return constant(TYPES[arg.datatype], arg.value)